@@ -0,0 +1,111 @@
+"""Compare EasyOCR CPU variants on crops from a video.
+
+Variants:
+  stock        easyocr.Reader(['ch_tra']), as the editor used to load it
+  fp32         gpu=False, quantize=False
+  easyocr-cpu  the easyocr-cpu engine: int8 modules cached on disk, pinned threads
+
+Reports load time, per-crop latency, agreement with the stock reader and,
+for synthetic videos, exact-text rate against the reference captions.
+Needs easyocr and its model weights.
+
+    python benchmarks/cpu_inference.py [--video v.mp4] [--samples 200] [--threads 4]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import cv2  # noqa: E402
+
+from extraction import synthetic_video  # noqa: E402
+from ocr_engines import EasyOCRCPUEngine, EasyOCREngine  # noqa: E402
+from pipeline import crop_range  # noqa: E402
+from synthetic import BAND, read_marker  # noqa: E402
+
+
+class FP32Engine(EasyOCREngine):
+    def load(self):
+        if self.reader is None:
+            import easyocr
+            self.reader = easyocr.Reader(self.languages, gpu=False, quantize=False)
+
+
+def sample_crops(video, ocr_range, samples):
+    cap = cv2.VideoCapture(video)
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    crops = []
+    for i in range(samples):
+        cap.set(cv2.CAP_PROP_POS_FRAMES, i * total_frames // samples)
+        ret, frame = cap.read()
+        if ret:
+            crops.append(crop_range(frame, ocr_range).copy())
+    cap.release()
+    return crops
+
+
+def run(engine, crops):
+    start = time.perf_counter()
+    engine.load()
+    load_s = time.perf_counter() - start
+    texts, latencies = [], []
+    for crop in crops:
+        start = time.perf_counter()
+        result = engine.read(crop)
+        latencies.append(time.perf_counter() - start)
+        texts.append(''.join(text for text, _ in result).replace(' ', ''))
+    return load_s, latencies, texts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--video', help='video to sample; defaults to a synthetic one')
+    parser.add_argument('--range', help='OCR region as JSON, e.g. {"top": 0.76, ...}')
+    parser.add_argument('--samples', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=os.cpu_count())
+    parser.add_argument('--workdir', default=os.path.join(tempfile.gettempdir(), 'ocr-subtitle-bench'))
+    args = parser.parse_args()
+
+    import torch
+    torch.set_num_threads(args.threads)
+
+    reference = None
+    video = args.video
+    ocr_range = json.loads(args.range) if args.range else BAND
+    if video is None:
+        os.makedirs(args.workdir, exist_ok=True)
+        video = synthetic_video(args.workdir, 60, 1280, 720, 0)
+        with open(os.path.splitext(video)[0] + '.json', encoding='utf-8') as f:
+            reference = json.load(f)['texts']
+    crops = sample_crops(video, ocr_range, args.samples)
+    expected = None
+    if reference is not None:
+        expected = [reference[code] if (code := read_marker(crop)) is not None else '' for crop in crops]
+
+    variants = [('stock', EasyOCREngine()), ('fp32', FP32Engine(gpu=False)),
+                ('easyocr-cpu', EasyOCRCPUEngine(threads=args.threads))]
+    stock_texts = None
+    print(f'{len(crops)} crops, {args.threads} threads\n')
+    print(f'{"variant":<14}{"load s":>8}{"mean ms":>10}{"p95 ms":>10}{"crops/s":>9}{"agree":>8}{"exact":>8}')
+    for name, engine in variants:
+        load_s, latencies, texts = run(engine, crops)
+        stock_texts = stock_texts or texts
+        agree = sum(a == b for a, b in zip(texts, stock_texts)) / len(texts)
+        exact = sum(a == b for a, b in zip(texts, expected)) / len(texts) if expected else float('nan')
+        latencies.sort()
+        print(f'{name:<14}{load_s:>8.2f}{statistics.mean(latencies) * 1000:>10.1f}'
+              f'{latencies[int(len(latencies) * 0.95)] * 1000:>10.1f}'
+              f'{len(latencies) / sum(latencies):>9.1f}{agree:>8.2%}{exact:>8.2%}')
+    # the cached variant pays for conversion on its first load only
+    engine = EasyOCRCPUEngine(threads=args.threads)
+    start = time.perf_counter()
+    engine.load()
+    print(f'\neasyocr-cpu load from cache: {time.perf_counter() - start:.2f} s')
+
+
+if __name__ == '__main__':
+    main()
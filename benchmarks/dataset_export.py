@@ -0,0 +1,60 @@
+"""Dataset export throughput on a synthetic video.
+
+Exports the reference SRT of a synthetic video with 1 worker and with
+--workers, and checks that every crop shows the caption its text belongs to.
+
+    python benchmarks/dataset_export.py [--duration 600] [--workers 8] [--frames 3]
+"""
+import argparse
+import glob
+import json
+import os
+import shutil
+import sys
+import tarfile
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import cv2  # noqa: E402
+import numpy as np  # noqa: E402
+
+from export import export_dataset  # noqa: E402
+from extraction import synthetic_video  # noqa: E402
+from synthetic import BAND, read_marker  # noqa: E402
+
+
+def check(output_dir):
+    good = total = 0
+    for path in sorted(glob.glob(os.path.join(output_dir, '*.tar'))):
+        with tarfile.open(path) as tar:
+            for name in tar.getnames():
+                if not name.endswith('.jpg'):
+                    continue
+                image = cv2.imdecode(np.frombuffer(tar.extractfile(name).read(), np.uint8), cv2.IMREAD_COLOR)
+                info = json.loads(tar.extractfile(name[:-4] + '.json').read())
+                good += read_marker(image) == info['index']
+                total += 1
+    return good, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--duration', type=float, default=600)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--frames', type=int, default=3, help='crops per subtitle')
+    parser.add_argument('--workdir', default=os.path.join(tempfile.gettempdir(), 'ocr-subtitle-bench'))
+    args = parser.parse_args()
+
+    os.makedirs(args.workdir, exist_ok=True)
+    video = synthetic_video(args.workdir, args.duration, 1280, 720, 0)
+    for workers in sorted({1, args.workers}):
+        output_dir = os.path.join(args.workdir, f'export-{workers}')
+        shutil.rmtree(output_dir, ignore_errors=True)
+        print(f'\n{workers} worker(s):')
+        export_dataset(output_dir, [video], json.dumps(BAND), workers, shard_size=100, frames=args.frames)
+        good, total = check(output_dir)
+        print(f'crops matching their text: {good}/{total}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""Time editor hot paths on large subtitle files.
+
+The index and SubtitleMaker paths run anywhere; update_subtitle_list and
+display_subtitle need a display and are skipped without one.
+
+    python benchmarks/editor_hot_paths.py [--lines 20000] [--video synthetic.mp4]
+"""
+from datetime import timedelta
+import argparse
+import copy
+import os
+import random
+import statistics
+import sys
+import time
+import tkinter as tk
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pysrt  # noqa: E402
+
+from intervals import IntervalIndex  # noqa: E402
+from search import SubtitleIndex  # noqa: E402
+from synthetic import make_script  # noqa: E402
+from utils import SubtitleMaker  # noqa: E402
+
+
+def timed(name, fn, repeat=5):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    print(f'{name:<36} median {statistics.median(times) * 1000:9.2f} ms  ({repeat} runs)')
+
+
+def make_subtitles(lines, seed=0):
+    # ~3 s per caption
+    subtitles = make_script(lines * 3, seed)
+    while len(subtitles) < lines:
+        subtitles.extend(make_script(lines * 3, seed + len(subtitles)))
+    del subtitles[lines:]
+    return subtitles
+
+
+def bench_indexes(subtitles):
+    index = SubtitleIndex()
+    timed('SubtitleIndex.sync (cold)', lambda: SubtitleIndex().sync(subtitles), 3)
+    index.sync(subtitles)
+    timed('SubtitleIndex.sync (one edit)',
+          lambda: (setattr(subtitles[len(subtitles) // 2], 'text', random.choice('我你他') * 5),
+                   index.sync(subtitles)))
+    timed('SubtitleIndex.search substring', lambda: index.search('等一'), 20)
+    timed('SubtitleIndex.search regex', lambda: index.search('等.下', regex=True), 20)
+
+    intervals = IntervalIndex()
+    timed('IntervalIndex.sync (cold)', lambda: IntervalIndex().sync(subtitles), 3)
+    intervals.sync(subtitles)
+    timed('IntervalIndex.sync (unchanged)', lambda: intervals.sync(subtitles))
+    timed('IntervalIndex overlaps + gaps', lambda: (intervals.overlaps(), intervals.gaps(50)))
+    total_ms = intervals.max_ends[-1]
+    timed('IntervalIndex.at x1000', lambda: [intervals.at(random.randrange(total_ms)) for _ in range(1000)])
+    timed('IntervalIndex.coverage (1000 px)', lambda: intervals.coverage(total_ms, 1000))
+
+    # one caption spanning the whole file (e.g. a stuck OCR line) overlaps every other one
+    spanning = copy.copy(subtitles[0])
+    spanning.end = subtitles[-1].end
+    intervals.sync([spanning] + subtitles)
+    timed('IntervalIndex overlaps (one long)', intervals.overlaps)
+
+
+def bench_maker(frames):
+    def run():
+        maker = SubtitleMaker()
+        texts = ['', '你好嗎', '你好嗎', '你好', '我很好謝謝你', '我很好謝謝', '']
+        for i in range(frames):
+            maker.next_frame(timedelta(milliseconds=i * 100), texts[i // 10 % len(texts)], 0.9, i)
+    timed(f'SubtitleMaker.next_frame x{frames}', run, 3)
+
+
+def bench_editor(subtitles, video):
+    try:
+        import editor
+        root = editor.TkinterDnD.Tk()
+    except tk.TclError as e:
+        print(f'editor widgets skipped ({e})')
+        return
+    app = editor.SubtitleEditorApp(root)
+    root.update()
+    app.subtitles = pysrt.SubRipFile(subtitles)
+    timed('update_subtitle_list (cold)',
+          lambda: (setattr(app, 'intervals', IntervalIndex()), app.update_subtitle_list()), 3)
+    timed('update_subtitle_list (warm)', app.update_subtitle_list, 3)
+    if video:
+        app.load_video(video)
+        timed('display_subtitle x50',
+              lambda: [app.display_subtitle(random.choice(app.subtitles)) for _ in range(50)], 3)
+    else:
+        print('display_subtitle skipped (no --video)')
+    root.destroy()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lines', type=int, default=20000)
+    parser.add_argument('--video', help='video for display_subtitle, e.g. one made by synthetic.py')
+    args = parser.parse_args()
+
+    random.seed(0)
+    subtitles = make_subtitles(args.lines)
+    print(f'{len(subtitles)} subtitles')
+    bench_indexes(subtitles)
+    bench_maker(args.lines * 10)
+    bench_editor(subtitles, args.video)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""Compare OCR engines on the same synthetic video.
+
+Runs the extraction pipeline once per engine and prints throughput and
+accuracy side by side. Real engines only read the captions if the video was
+rendered with a CJK font (see synthetic.py --font).
+
+    python benchmarks/engines.py [--engines stub tesseract easyocr] [--duration 60]
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pysrt  # noqa: E402
+
+import pipeline  # noqa: E402
+from extraction import score, synthetic_video  # noqa: E402
+from metrics import Metrics  # noqa: E402
+from ocr_engines import available_engines  # noqa: E402
+from synthetic import BAND, stub_engine  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--engines', nargs='+', default=available_engines())
+    parser.add_argument('--duration', type=float, default=60)
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=720)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workdir', default=os.path.join(tempfile.gettempdir(), 'ocr-subtitle-bench'))
+    args = parser.parse_args()
+
+    os.makedirs(args.workdir, exist_ok=True)
+    video = synthetic_video(args.workdir, args.duration, args.width, args.height, args.seed)
+    reference = pysrt.open(os.path.splitext(video)[0] + '.srt')
+
+    rows = []
+    for name in args.engines:
+        engine = stub_engine([s.text for s in reference]) if name == 'stub' else name
+        metrics = Metrics(name)
+        try:
+            subtitles = pipeline.extract_subtitles(video, BAND, metrics=metrics, engine=engine)
+        except Exception as e:
+            print(f'{name}: failed ({e})')
+            continue
+        report = metrics.report()
+        accuracy = score(reference, subtitles)
+        rows.append((name, report['stages']['model_load']['total_ms'],
+                     report['stages']['ocr']['mean_ms'], report['throughput']['sampled_frames_per_s'],
+                     accuracy['exact_text_rate'], accuracy['char_error_rate']))
+
+    print(f'\n{"engine":<12}{"load ms":>10}{"ocr ms":>10}{"frames/s":>10}{"exact":>8}{"CER":>8}')
+    for row in rows:
+        print(f'{row[0]:<12}{row[1]:>10.0f}{row[2]:>10.2f}{row[3]:>10.1f}{row[4]:>8}{row[5]:>8}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+"""End-to-end extraction benchmark on synthetic videos.
+
+Generates (or reuses) a synthetic video, runs pipeline.extract_subtitles with
+the deterministic stub engine in place of EasyOCR, and reports throughput,
+stage timings and how well the output matches the reference SRT.
+
+    python benchmarks/extraction.py [--duration 120] [--error-rate 0.1] [--ocr-ms 0] [--cache c.sqlite3]
+    python benchmarks/extraction.py --false-hits 200
+
+Runs without the OCR cache unless --cache is given; run twice with the same
+file to measure a warm cache. --false-hits measures the cache alone on
+textured backgrounds: how often it returns another line's text (should be
+never) and how often it recognizes a line seen before.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import cv2  # noqa: E402
+import pysrt  # noqa: E402
+
+import pipeline  # noqa: E402
+from metrics import Metrics  # noqa: E402
+from ocr_cache import OCRCache, signature  # noqa: E402
+from synthetic import BAND, load_font, make_video, render_caption, stub_engine, textured_background  # noqa: E402
+from utils import edit_distance, get_milliseconds  # noqa: E402
+
+
+def overlap(a, b):
+    return min(get_milliseconds(a.end), get_milliseconds(b.end)) - \
+        max(get_milliseconds(a.start), get_milliseconds(b.start))
+
+
+def score(reference, hypothesis):
+    """Match each reference caption to the output caption overlapping it most"""
+    matched = set()
+    exact = chars = errors = 0
+    start_errors, end_errors = [], []
+    for ref in reference:
+        best = max(range(len(hypothesis)), key=lambda i: overlap(ref, hypothesis[i]), default=None)
+        chars += len(ref.text)
+        if best is None or overlap(ref, hypothesis[best]) <= 0:
+            errors += len(ref.text)
+            continue
+        hyp = hypothesis[best]
+        matched.add(best)
+        errors += edit_distance(ref.text, hyp.text)
+        exact += ref.text == hyp.text
+        start_errors.append(abs(get_milliseconds(ref.start) - get_milliseconds(hyp.start)))
+        end_errors.append(abs(get_milliseconds(ref.end) - get_milliseconds(hyp.end)))
+    return {
+        'reference': len(reference),
+        'output': len(hypothesis),
+        'missed': len(reference) - len(start_errors),
+        'extra': len(hypothesis) - len(matched),
+        'exact_text_rate': round(exact / len(reference), 4) if reference else None,
+        'char_error_rate': round(errors / chars, 4) if chars else None,
+        'mean_start_error_ms': round(sum(start_errors) / len(start_errors), 1) if start_errors else None,
+        'mean_end_error_ms': round(sum(end_errors) / len(end_errors), 1) if end_errors else None,
+    }
+
+
+def synthetic_video(workdir, duration, width, height, seed):
+    path = os.path.join(workdir, f'synthetic_{duration:g}s_{width}x{height}_{seed}.mp4')
+    if not os.path.exists(path):
+        print(f'generating {path}...')
+        make_video(path, duration, width=width, height=height, seed=seed)
+    return path
+
+
+def cache_false_hits(lines, width, height, seed=0):
+    """Wrong and right cache hits for random lines rendered over textured backgrounds
+
+    Half the lines are stored from clean frames. Unseen lines and one-letter
+    edits of stored lines are then looked up from JPEG-compressed frames, and
+    any hit counts as false; stored lines are looked up again at several JPEG
+    qualities and over another background to measure the hit rate.
+    """
+    rng = random.Random(seed)
+    # Latin letters render with any font and differ from each other by a single stroke
+    letters = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789'
+    texts = list(dict.fromkeys(''.join(rng.choice(letters) for _ in range(10)) for _ in range(lines)))
+    seen, unseen = texts[:len(texts) // 2], texts[len(texts) // 2:]
+    edits = []
+    for text in seen:
+        i = rng.randrange(len(text))
+        edits.append(text[:i] + rng.choice(letters.replace(text[i], '')) + text[i + 1:])
+
+    font = load_font(int(height * (BAND['bottom'] - BAND['top']) * 0.5))
+    backgrounds = [textured_background(width, height, seed + k) for k in range(2)]
+    cache = OCRCache(':memory:')
+
+    def lookup(text, background=0, quality=None):
+        overlay, mask = render_caption((width, height), text, 0, font)
+        frame = backgrounds[background].copy()
+        frame[mask] = overlay[mask]
+        if quality:
+            _, data = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+            frame = cv2.imdecode(data, cv2.IMREAD_COLOR)
+        key = signature(pipeline.crop_range(frame, BAND))
+        return key, cache.get('stub', key) if key is not None else None
+
+    for text in seen:
+        key, _ = lookup(text)
+        if key is not None:
+            cache.put('stub', key, text, 1.0)
+    results = {'stored': len(cache)}
+    false = 0
+    for text in unseen + edits:
+        false += lookup(text, quality=75)[1] is not None
+    results['false_hits'] = f'{false}/{len(unseen) + len(edits)}'
+    for name, background, quality in (('jpeg90', 0, 90), ('jpeg75', 0, 75), ('jpeg50', 0, 50),
+                                      ('other_background', 1, 90)):
+        hits = 0
+        for text in seen:
+            result = lookup(text, background, quality)[1]
+            hits += result is not None and result[0] == text
+            false += result is not None and result[0] != text
+        results[f'hit_rate_{name}'] = round(hits / len(seen), 3)
+    results['false_hits_total'] = false
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--duration', type=float, default=120)
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=720)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--error-rate', type=float, default=0.1,
+                        help='fraction of stub reads that drop a character')
+    parser.add_argument('--ocr-ms', type=float, default=0, help='simulated model latency per call')
+    parser.add_argument('--text-height', type=int, default=64,
+                        help="stub's preferred text height; with a detection pass like EasyOCR's, "
+                             "so crops are rescaled as for it; 0 for none")
+    parser.add_argument('--workdir', default=os.path.join(tempfile.gettempdir(), 'ocr-subtitle-bench'))
+    parser.add_argument('--cache', help='OCR cache file to read and fill')
+    parser.add_argument('--report', help='write the metrics report (with accuracy) to this JSON file')
+    parser.add_argument('--false-hits', type=int, default=0, metavar='LINES',
+                        help='only measure OCR cache false hits with this many random lines')
+    args = parser.parse_args()
+
+    if args.false_hits:
+        for key, value in cache_false_hits(args.false_hits, args.width, args.height, args.seed).items():
+            print(f'  {key:<20} {value}')
+        return
+
+    os.makedirs(args.workdir, exist_ok=True)
+    video = synthetic_video(args.workdir, args.duration, args.width, args.height, args.seed)
+    reference = pysrt.open(os.path.splitext(video)[0] + '.srt')
+    texts = [s.text for s in reference]
+
+    engine = stub_engine(texts, error_rate=args.error_rate, delay_ms=args.ocr_ms,
+                         preferred_height=args.text_height or None, detection_free=not args.text_height)
+    metrics = Metrics(os.path.basename(video))
+    cache = OCRCache(args.cache) if args.cache else False
+    subtitles = pipeline.extract_subtitles(video, BAND, metrics=metrics, engine=engine, cache=cache)
+    report = metrics.report()
+    report['accuracy'] = score(reference, subtitles)
+
+    print(f'\nelapsed {report["elapsed_s"]} s, '
+          f'{report["throughput"]["frames_per_s"]} frames/s, '
+          f'{report["throughput"]["sampled_frames_per_s"]} sampled frames/s, '
+          f'cache hit rate {report["rates"]["cache_hit_rate"]}')
+    print(f'text height {report["info"]["text_height"]}, scale {report["info"]["scale"]}')
+    for name, stage in report['stages'].items():
+        print(f'  {name:<10} mean {stage["mean_ms"]:>8} ms  p95 {stage["p95_ms"]:>8} ms  n={stage["count"]}')
+    for key, value in report['accuracy'].items():
+        print(f'  {key:<20} {value}')
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Measure how long the editor takes to start.
+
+Each run starts a fresh interpreter, so module caches do not hide import cost.
+
+    python benchmarks/startup.py [--runs 5]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SCRIPT = '''
+import time
+t = time.perf_counter()
+import editor
+print(time.perf_counter() - t)
+'''
+
+WINDOW_SCRIPT = '''
+import time
+t = time.perf_counter()
+import editor
+root = editor.TkinterDnD.Tk()
+app = editor.SubtitleEditorApp(root)
+root.update()
+print(time.perf_counter() - t)
+root.destroy()
+'''
+
+
+def measure(script, runs):
+    times = []
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, '-c', script], cwd=ROOT,
+                                capture_output=True, text=True)
+        if result.returncode != 0:
+            return None, result.stderr.strip().splitlines()[-1]
+        times.append(float(result.stdout.strip().splitlines()[-1]))
+    return times, None
+
+
+def report(name, times, error):
+    if times is None:
+        print(f'{name:<16} skipped ({error})')
+    else:
+        print(f'{name:<16} median {statistics.median(times) * 1000:8.1f} ms  '
+              f'min {min(times) * 1000:8.1f} ms  ({len(times)} runs)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    report('import editor', *measure(IMPORT_SCRIPT, args.runs))
+    report('window shown', *measure(WINDOW_SCRIPT, args.runs))
+    heavy = [m for m in ('easyocr', 'torch') if m in subprocess.run(
+        [sys.executable, '-c', 'import sys, editor; print(" ".join(sys.modules))'],
+        cwd=ROOT, capture_output=True, text=True).stdout.split()]
+    print(f'heavy modules loaded at startup: {", ".join(heavy) or "none"}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,220 @@
+"""Generate a synthetic subtitled video with a reference SRT.
+
+Captions are rendered into a known band with known timings. Next to each
+caption a row of squares encodes its index, so stub_engine can "read" the
+caption back from the cropped band without any model weights.
+
+    python benchmarks/synthetic.py out.mp4 [--duration 60] [--width 1280 --height 720]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+
+import cv2
+import numpy as np
+import pysrt
+from PIL import Image, ImageDraw, ImageFont
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ocr_engines import StubEngine  # noqa: E402
+from utils import get_milliseconds  # noqa: E402
+
+# where captions are drawn, as ratios of the frame; use it as the OCR region
+BAND = {'top': 0.80, 'bottom': 0.95, 'left': 0.10, 'right': 0.90}
+MARKER_BITS = 12
+# marker squares, as ratios of the band: x of the first square, step between squares and size
+MARKER_X = 0.01
+MARKER_STEP = 0.02
+MARKER_SIZE = 0.015
+CHARS = '我你他她們的是不了人在有這個來去說要看好會就也和到時想知道等一下親愛阿爸阿母囡仔今仔日恁咱'
+FONT_CANDIDATES = [
+    '/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc',
+    '/usr/share/fonts/noto-cjk/NotoSansCJK-Regular.ttc',
+    '/usr/share/fonts/truetype/wqy/wqy-zenhei.ttc',
+    '/System/Library/Fonts/PingFang.ttc',
+    '/System/Library/Fonts/STHeiti Medium.ttc',
+    'C:/Windows/Fonts/msjh.ttc',
+]
+
+
+def load_font(size, path=None):
+    for candidate in [path] + FONT_CANDIDATES:
+        if candidate and os.path.exists(candidate):
+            return ImageFont.truetype(candidate, size)
+    # no CJK glyphs: captions render as boxes, which is still text-like for the pipeline
+    return ImageFont.load_default(size)
+
+
+def make_script(duration_s, seed=0, min_gap_ms=0):
+    """Random captions with known timings, as a pysrt.SubRipFile"""
+    rng = random.Random(seed)
+    subtitles = pysrt.SubRipFile()
+    t = rng.randint(500, 2000)
+    while True:
+        length = rng.randint(1000, 4000)
+        if t + length > duration_s * 1000:
+            break
+        text = ''.join(rng.choice(CHARS) for _ in range(rng.randint(4, 14)))
+        subtitles.append(pysrt.SubRipItem(
+            index=len(subtitles) + 1,
+            start=pysrt.SubRipTime(milliseconds=t),
+            end=pysrt.SubRipTime(milliseconds=t + length),
+            text=text))
+        # some captions follow each other directly, as they do in real shows
+        t += length + (0 if rng.random() < 0.2 else rng.randint(max(min_gap_ms, 200), 1500))
+    return subtitles
+
+
+def draw_marker(draw, code, band_box, fill=(255, 255, 255)):
+    left, top, right, bottom = band_box
+    width, height = right - left, bottom - top
+    size = max(2, int(width * MARKER_SIZE))
+    y = top + (height - size) // 2
+    # the first square is always on so an empty band is never read as caption 0
+    for bit in range(MARKER_BITS + 1):
+        if bit == 0 or code >> (bit - 1) & 1:
+            x = left + int(width * (MARKER_X + bit * MARKER_STEP))
+            draw.rectangle([x, y, x + size, y + size], fill=fill)
+
+
+def render_caption(size, text, code, font, band=BAND):
+    """RGB overlay and mask for one caption"""
+    width, height = size
+    image = Image.new('RGB', size)
+    draw = ImageDraw.Draw(image)
+    band_box = (int(width * band['left']), int(height * band['top']),
+                int(width * band['right']), int(height * band['bottom']))
+    draw_marker(draw, code, band_box)
+    text_left = band_box[0] + int((band_box[2] - band_box[0]) * (MARKER_X + (MARKER_BITS + 2) * MARKER_STEP))
+    text_width = draw.textlength(text, font=font)
+    x = max(text_left, (width - text_width) / 2)
+    y = (band_box[1] + band_box[3]) / 2
+    draw.text((x, y), text, font=font, fill=(255, 255, 255), anchor='lm',
+              stroke_width=max(1, font.size // 12), stroke_fill=(0, 0, 0))
+    # the stroke is black, so the mask comes from a second pass without the fill colour
+    mask_image = Image.new('L', size)
+    mask_draw = ImageDraw.Draw(mask_image)
+    draw_marker(mask_draw, code, band_box, fill=255)
+    mask_draw.text((x, y), text, font=font, fill=255, anchor='lm',
+                   stroke_width=max(1, font.size // 12), stroke_fill=255)
+    overlay = np.ascontiguousarray(np.array(image)[:, :, ::-1])
+    return overlay, np.array(mask_image) > 0
+
+
+def make_background(width, height):
+    """Gradient wider than the frame; panning across it keeps frames from being trivially compressible"""
+    x = np.linspace(0, 255, width + 256, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    wide = np.empty((height, width + 256, 3), np.uint8)
+    wide[:, :, 0] = x % 256
+    wide[:, :, 1] = y
+    wide[:, :, 2] = (x + y) / 2 % 256
+    return wide
+
+
+def textured_background(width, height, seed=0):
+    """Busy, colourful noise at several scales, bright in places like foliage or snow"""
+    rng = np.random.default_rng(seed)
+    layers = [cv2.resize(rng.random((height // step + 1, width // step + 1), np.float32), (width, height))
+              for step in (4, 16, 64)]
+    texture = cv2.normalize(sum(layers), None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
+    return cv2.applyColorMap(texture, cv2.COLORMAP_JET)
+
+
+def make_video(path, duration_s=60, fps=30, width=1280, height=720, seed=0, font_path=None):
+    """Write the video, <name>.srt and <name>.json (band + codes) next to it; return the script"""
+    subtitles = make_script(duration_s, seed)
+    font = load_font(int(height * (BAND['bottom'] - BAND['top']) * 0.5), font_path)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    if not writer.isOpened():
+        raise RuntimeError(f'cannot write {path}')
+
+    total_frames = int(duration_s * fps)
+    wide = make_background(width, height)
+    current, overlay, mask = None, None, None
+    for i in range(total_frames):
+        ms = i * 1000 / fps
+        offset = i * 2 % 256
+        frame = wide[:, offset:offset + width].copy()
+        active = next((n for n, s in enumerate(subtitles)
+                       if get_milliseconds(s.start) <= ms < get_milliseconds(s.end)), None)
+        if active != current:
+            current = active
+            if active is not None:
+                overlay, mask = render_caption((width, height), subtitles[active].text, active, font)
+        if current is not None:
+            rows = slice(int(height * BAND['top']), int(height * BAND['bottom']) + 1)
+            np.copyto(frame[rows], overlay[rows], where=mask[rows, :, None])
+        writer.write(frame)
+    writer.release()
+
+    base = os.path.splitext(path)[0]
+    subtitles.save(base + '.srt', encoding='utf-8')
+    with open(base + '.json', 'w', encoding='utf-8') as f:
+        json.dump({'band': BAND, 'fps': fps, 'duration_s': duration_s,
+                   'texts': [s.text for s in subtitles]}, f, ensure_ascii=False)
+    return subtitles
+
+
+def read_marker(image):
+    """Decode the caption index from a band crop, or None if no caption is shown"""
+    height, width = image.shape[:2]
+    size = max(1, int(width * MARKER_SIZE))
+    y = height // 2
+    code = 0
+    for bit in range(MARKER_BITS + 1):
+        x = int(width * (MARKER_X + bit * MARKER_STEP)) + size // 2
+        patch = image[max(0, y - size // 4):y + size // 4 + 1,
+                      max(0, x - size // 4):x + size // 4 + 1]
+        on = patch.mean() > 200
+        if bit == 0 and not on:
+            return None
+        if bit and on:
+            code |= 1 << (bit - 1)
+    return code
+
+
+def stub_engine(texts, error_rate=0.0, delay_ms=0, seed=0, **capabilities):
+    """Deterministic OCR engine for synthetic videos
+
+    Reads the caption index from the marker and returns the reference text.
+    `error_rate` drops a character from that fraction of reads to exercise
+    SubtitleMaker's merging, and `delay_ms` simulates model latency.
+    Capabilities such as preferred_height are passed on to StubEngine.
+    """
+    rng = random.Random(seed)
+
+    def read(image):
+        code = read_marker(image)
+        if code is None or code >= len(texts):
+            return []
+        text = texts[code]
+        confidence = 0.6 + 0.4 * ((code * 7919) % 100) / 100
+        if error_rate and rng.random() < error_rate and len(text) > 1:
+            i = rng.randrange(len(text))
+            text = text[:i] + text[i + 1:]
+            confidence *= 0.7
+        return [(text, confidence)]
+
+    return StubEngine(read, delay_ms=delay_ms, **capabilities)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('output')
+    parser.add_argument('--duration', type=float, default=60)
+    parser.add_argument('--fps', type=float, default=30)
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=720)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--font', help='TrueType font with CJK glyphs')
+    args = parser.parse_args()
+    subtitles = make_video(args.output, args.duration, args.fps, args.width, args.height,
+                           args.seed, args.font)
+    print(f'{args.output}: {len(subtitles)} captions')
+
+
+if __name__ == '__main__':
+    main()
@@ -2,32 +2,58 @@ from PIL import Image, ImageTk, ImageDraw
 from tkinter import ttk
 from datetime import timedelta
 import tkinter as tk
-from tkinter import filedialog, messagebox, font
+from tkinter import filedialog, messagebox, simpledialog, font
 import cv2
-import easyocr
 import pysrt
 from PIL import Image, ImageTk
 from tkinterdnd2 import DND_FILES, TkinterDnD
 import copy
+import os
+import re
 import threading
-from tqdm import trange
 from utils import *
-
-reader = None
-OCR_INTERVAL = 3
+from search import SubtitleIndex, replace_text
+from intervals import IntervalIndex
+from pipeline import DEFAULT_ENGINE, existing_outputs, free_output_path, preload_engine
+from ocr_engines import available_engines
+from jobs import OCRJob, JobScheduler, RUNNING
+from progress import ProgressChannel, RateMeter
+from roi import DEFAULT_RANGE, DEFAULT_TRACK, REGION_NAME, detect_caption_region, named_ranges
+
+# subtitles closer than this are highlighted as adjacent in the list
+ADJACENT_GAP_MS = 50
+# OCR confidence below which a subtitle is put in the review queue
+REVIEW_CONFIDENCE = 0.6
+VIDEO_EXTENSIONS = ('.mp4', '.webm')
+# how often worker progress is drawn
+PROGRESS_TICK_MS = 200
+# where an added OCR region starts: a band at the top, where lyrics usually go
+NEW_REGION = {'top': 0.02, 'bottom': 0.2, 'left': 0.10, 'right': 0.90}
 
 
 class OCRRangeSelector:
-    def __init__(self, parent, cap, timeline_total_ms):
+    def __init__(self, parent, cap, timeline_total_ms, initial=None, video_path=None, channel=None,
+                 detect=False):
+        """video_path and channel enable caption-region detection, which runs in a
+        worker thread and hands its proposal back through the channel; with
+        detect=True it starts right away and pre-fills the region unless the user
+        has already moved it
+        """
         self.parent = parent
         self.cap = cap
         self.timeline_total_ms = timeline_total_ms
+        self.video_path = video_path
+        self.channel = channel
         self.result = None
+        self.closed = False
+        self.detecting = False
+        self.touched = False
 
-        self.top_ratio = 0.76
-        self.bottom_ratio = 0.98
-        self.left_ratio = 0.10
-        self.right_ratio = 0.90
+        # several named regions can be selected; the ratios below belong to the active one
+        self.regions = {name: dict(ocr_range)
+                        for name, ocr_range in named_ranges(initial or DEFAULT_RANGE).items()}
+        self.active = next(iter(self.regions))
+        self.set_range(self.regions[self.active])
 
         self.dragging = None
         self.drag_start_y = 0
@@ -35,6 +61,8 @@ class OCRRangeSelector:
 
         self.setup_ui()
         self.update_frame(0)
+        if detect:
+            self.start_detection()
 
     def setup_ui(self):
         self.dialog = tk.Toplevel(self.parent)
@@ -94,8 +122,15 @@ class OCRRangeSelector:
         range_frame.pack(fill=tk.X, pady=(10, 0))
 
         tk.Label(range_frame, text="OCR Region:").pack(side=tk.LEFT)
+        self.region_var = tk.StringVar(value=self.active)
+        self.region_combo = ttk.Combobox(
+            range_frame, textvariable=self.region_var, values=list(self.regions), state='readonly', width=12)
+        self.region_combo.pack(side=tk.LEFT, padx=(5, 0))
+        self.region_combo.bind("<<ComboboxSelected>>", lambda e: self.select_region(self.region_var.get()))
         self.range_label = tk.Label(range_frame, text="")
         self.range_label.pack(side=tk.LEFT, padx=(10, 0))
+        self.detect_label = tk.Label(range_frame, text="", fg='gray')
+        self.detect_label.pack(side=tk.RIGHT)
 
         # Button frame
         button_frame = tk.Frame(main_frame)
@@ -109,6 +144,26 @@ class OCRRangeSelector:
         )
         reset_button.pack(side=tk.LEFT)
 
+        self.detect_button = tk.Button(
+            button_frame,
+            text="Detect region",
+            command=self.detect_range,
+            state=tk.NORMAL if self.video_path and self.channel else tk.DISABLED
+        )
+        self.detect_button.pack(side=tk.LEFT, padx=(5, 0))
+
+        tk.Button(
+            button_frame,
+            text="Add region",
+            command=self.add_region
+        ).pack(side=tk.LEFT, padx=(5, 0))
+
+        tk.Button(
+            button_frame,
+            text="Remove region",
+            command=self.remove_region
+        ).pack(side=tk.LEFT, padx=(5, 0))
+
         # OK and Cancel buttons
         tk.Button(
             button_frame,
@@ -178,6 +233,15 @@ class OCRRangeSelector:
         """Draw OCR region on the image"""
         draw = ImageDraw.Draw(pil_image)
 
+        # inactive regions get a thin cyan outline and their name
+        for name, ocr_range in self.regions.items():
+            if name == self.active:
+                continue
+            box = [int(width * ocr_range['left']), int(height * ocr_range['top']),
+                   int(width * ocr_range['right']), int(height * ocr_range['bottom'])]
+            draw.rectangle(box, outline='cyan', width=1)
+            draw.text((box[0] + 3, box[1] + 2), name, fill='cyan')
+
         # Calculate actual coordinates
         top = int(height * self.top_ratio)
         bottom = int(height * self.bottom_ratio)
@@ -214,6 +278,8 @@ class OCRRangeSelector:
 
         x, y = event.x, event.y
         width, height = self.current_width, self.current_height
+        # a detection finishing later must not undo the user's adjustment
+        self.touched = True
 
         # Calculate actual coordinates of current OCR region
         top = int(height * self.top_ratio)
@@ -295,25 +361,115 @@ class OCRRangeSelector:
             f"Left: {self.left_ratio:.2f}, Right: {self.right_ratio:.2f}"
         self.range_label.config(text=range_text)
 
+    def set_range(self, ocr_range):
+        self.top_ratio = ocr_range['top']
+        self.bottom_ratio = ocr_range['bottom']
+        self.left_ratio = ocr_range['left']
+        self.right_ratio = ocr_range['right']
+
+    def current_range(self):
+        return {
+            'top': self.top_ratio,
+            'bottom': self.bottom_ratio,
+            'left': self.left_ratio,
+            'right': self.right_ratio
+        }
+
+    def select_region(self, name):
+        """Make another region the one being edited"""
+        self.touched = True
+        self.regions[self.active] = self.current_range()
+        self.active = name
+        self.region_var.set(name)
+        self.region_combo.configure(values=list(self.regions))
+        self.set_range(self.regions[name])
+        self.update_frame(self.timeline_var.get())
+        self.update_range_display()
+
+    def add_region(self):
+        """Add a named region, e.g. for lyrics or a second language"""
+        name = simpledialog.askstring("Add region", "Region name:", parent=self.dialog)
+        if not name:
+            return
+        name = name.strip()
+        if not REGION_NAME.fullmatch(name):
+            messagebox.showerror("Error", "Region names may only contain letters, digits, _ and -.",
+                                 parent=self.dialog)
+            return
+        if name in self.regions:
+            messagebox.showerror("Error", f"Region '{name}' already exists.", parent=self.dialog)
+            return
+        self.regions[name] = dict(NEW_REGION)
+        self.select_region(name)
+
+    def remove_region(self):
+        if len(self.regions) == 1:
+            return
+        self.touched = True
+        del self.regions[self.active]
+        self.active = next(iter(self.regions))
+        self.region_var.set(self.active)
+        self.region_combo.configure(values=list(self.regions))
+        self.set_range(self.regions[self.active])
+        self.update_frame(self.timeline_var.get())
+        self.update_range_display()
+
     def reset_range(self):
         """Reset region to default values"""
-        self.top_ratio = 0.76
-        self.bottom_ratio = 0.98
-        self.left_ratio = 0.10
-        self.right_ratio = 0.90
+        self.touched = True
+        self.set_range(DEFAULT_RANGE)
+        current_time = self.timeline_var.get()
+        self.update_frame(current_time)
+        self.update_range_display()
 
+    def detect_range(self):
+        """Replace the region with one proposed from frames across the video"""
+        self.touched = False
+        self.start_detection()
+
+    def start_detection(self):
+        if self.detecting or not (self.video_path and self.channel):
+            return
+        self.detecting = True
+        self.detect_button.config(state=tk.DISABLED)
+        self.detect_label.config(text="Detecting caption region...")
+
+        def detect():
+            # the dialog's capture belongs to the Tk thread; seek a separate one
+            cap = cv2.VideoCapture(self.video_path)
+            try:
+                proposal = detect_caption_region(cap)
+            finally:
+                cap.release()
+            self.channel.call(self.on_detected, proposal)
+
+        threading.Thread(target=detect, daemon=True).start()
+
+    def on_detected(self, proposal):
+        self.detecting = False
+        if self.closed:
+            return
+        self.detect_button.config(state=tk.NORMAL)
+        if proposal is None:
+            self.detect_label.config(text="No captions found")
+            return
+        if self.touched:
+            self.detect_label.config(text="")
+            return
+        self.detect_label.config(text="Region detected")
+        self.set_range(proposal)
         current_time = self.timeline_var.get()
         self.update_frame(current_time)
         self.update_range_display()
 
     def confirm(self):
         """Confirm selection"""
-        self.result = {
-            'top': self.top_ratio,
-            'bottom': self.bottom_ratio,
-            'left': self.left_ratio,
-            'right': self.right_ratio
-        }
+        self.regions[self.active] = self.current_range()
+        if list(self.regions) == [DEFAULT_TRACK]:
+            self.result = self.regions[DEFAULT_TRACK]
+        else:
+            # several regions: one SRT per name, the first one is loaded into the editor
+            self.result = dict(self.regions)
         self.dialog.destroy()
 
     def cancel(self):
@@ -324,9 +480,96 @@ class OCRRangeSelector:
     def show(self):
         """Show dialog and wait for result"""
         self.dialog.wait_window()
+        self.closed = True
         return self.result
 
 
+class JobQueueWindow:
+    def __init__(self, parent, scheduler, on_open, on_add):
+        """on_add(paths) queues videos; paths is None to pick them in a file dialog"""
+        self.scheduler = scheduler
+        self.on_open = on_open
+        self.jobs = {}
+
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title("OCR Jobs")
+        self.dialog.geometry("800x300")
+        self.dialog.protocol("WM_DELETE_WINDOW", self.dialog.withdraw)
+        # videos dropped here are queued, even a single one
+        self.dialog.drop_target_register(DND_FILES)
+        self.dialog.dnd_bind('<<Drop>>', lambda e: on_add(self.dialog.tk.splitlist(e.data)))
+
+        main_frame = tk.Frame(self.dialog)
+        main_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+        self.tree = ttk.Treeview(main_frame, columns=('status', 'progress', 'speed', 'text'))
+        self.tree.heading('#0', text='Video')
+        self.tree.heading('status', text='Status')
+        self.tree.heading('progress', text='Progress')
+        self.tree.heading('speed', text='Speed / ETA')
+        self.tree.heading('text', text='Current text')
+        self.tree.column('status', width=80, stretch=False)
+        self.tree.column('progress', width=80, stretch=False)
+        self.tree.column('speed', width=140, stretch=False)
+        self.tree.pack(fill=tk.BOTH, expand=True)
+        self.tree.bind('<Double-1>', lambda e: self.open_selected())
+
+        button_frame = tk.Frame(main_frame)
+        button_frame.pack(fill=tk.X, pady=(10, 0))
+
+        for text, command in [("Pause", self.scheduler.pause),
+                              ("Resume", self.scheduler.resume),
+                              ("Cancel", self.scheduler.cancel)]:
+            tk.Button(
+                button_frame, text=text,
+                command=lambda command=command: [command(job) for job in self.selected_jobs()]
+            ).pack(side=tk.LEFT)
+        tk.Button(
+            button_frame, text="Open in editor", command=self.open_selected
+        ).pack(side=tk.LEFT, padx=(5, 0))
+        tk.Button(
+            button_frame, text="Add videos...", command=lambda: on_add(None)
+        ).pack(side=tk.LEFT, padx=(5, 0))
+
+        self.concurrency = tk.IntVar(value=self.scheduler.concurrency)
+        spinbox = tk.Spinbox(
+            button_frame, from_=1, to=os.cpu_count() or 8, width=3,
+            textvariable=self.concurrency, command=self.apply_concurrency)
+        # the arrows call command; a typed value is applied on Return or when leaving the box
+        spinbox.bind('<Return>', self.apply_concurrency)
+        spinbox.bind('<FocusOut>', self.apply_concurrency)
+        spinbox.pack(side=tk.RIGHT)
+        tk.Label(button_frame, text="Concurrent jobs:").pack(side=tk.RIGHT)
+
+    def apply_concurrency(self, event=None):
+        try:
+            self.scheduler.set_concurrency(self.concurrency.get())
+        except tk.TclError:
+            pass  # not a number
+        self.concurrency.set(self.scheduler.concurrency)
+
+    def show(self):
+        self.dialog.deiconify()
+        self.dialog.lift()
+
+    def refresh(self, job, speed=''):
+        values = (job.status, f'{job.progress:.0%}', speed, job.error or job.text)
+        iid = str(job.id)
+        if iid in self.jobs:
+            self.tree.item(iid, values=values)
+        else:
+            self.jobs[iid] = job
+            self.tree.insert('', tk.END, iid=iid, text=job.name, values=values)
+
+    def selected_jobs(self):
+        return [self.jobs[iid] for iid in self.tree.selection()]
+
+    def open_selected(self):
+        jobs = self.selected_jobs()
+        if jobs:
+            self.on_open(jobs[0])
+
+
 class SubtitleEditorApp:
     def __init__(self, root):
         self.root = root
@@ -342,6 +585,41 @@ class SubtitleEditorApp:
         self.main_pane.add(self.left_frame, minsize=400)
         self.main_pane.add(self.right_frame, minsize=400)
 
+        # Search and replace
+        self.search_frame = tk.Frame(self.left_frame)
+        self.search_frame.pack(fill=tk.X)
+        self.search_frame.columnconfigure(1, weight=1)
+
+        tk.Label(self.search_frame, text="Find:").grid(row=0, column=0, sticky='w')
+        self.search_var = tk.StringVar()
+        self.search_entry = tk.Entry(self.search_frame, textvariable=self.search_var)
+        self.search_entry.grid(row=0, column=1, sticky='ew')
+        self.search_count_text = tk.Label(self.search_frame, width=12, anchor='w')
+        self.search_count_text.grid(row=0, column=2, sticky='w')
+
+        tk.Label(self.search_frame, text="Replace:").grid(row=1, column=0, sticky='w')
+        self.replace_var = tk.StringVar()
+        self.replace_entry = tk.Entry(self.search_frame, textvariable=self.replace_var)
+        self.replace_entry.grid(row=1, column=1, sticky='ew')
+        tk.Button(
+            self.search_frame, text="Replace all", command=self.replace_all
+        ).grid(row=1, column=2, sticky='ew')
+
+        search_options = tk.Frame(self.search_frame)
+        search_options.grid(row=2, column=0, columnspan=3, sticky='w')
+        self.search_regex = tk.BooleanVar(value=False)
+        self.search_filter = tk.BooleanVar(value=False)
+        tk.Checkbutton(search_options, text="Regex", variable=self.search_regex,
+                       command=lambda: self.refresh_search(rebuild=False)).pack(side=tk.LEFT)
+        tk.Checkbutton(search_options, text="Show matches only", variable=self.search_filter,
+                       command=lambda: self.refresh_search(rebuild=False)).pack(side=tk.LEFT)
+
+        self.search_var.trace('w', lambda *args: self.refresh_search(rebuild=False))
+        self.search_entry.bind('<Return>', self.next_match)
+        self.search_entry.bind('<Escape>', self.listbox_focus)
+        self.replace_entry.bind('<Return>', lambda e: self.replace_all())
+        self.replace_entry.bind('<Escape>', self.listbox_focus)
+
         # Left-side subtitle list
         self.listbox = tk.Listbox(
             self.left_frame,
@@ -366,6 +644,20 @@ class SubtitleEditorApp:
         )
         self.ocr_button.pack(fill=tk.X)
 
+        self.queue_button = tk.Button(
+            self.left_frame, text="OCR job queue", command=self.open_job_queue
+        )
+        self.queue_button.pack(fill=tk.X)
+
+        engine_frame = tk.Frame(self.left_frame)
+        engine_frame.pack(fill=tk.X)
+        tk.Label(engine_frame, text="OCR engine:").pack(side=tk.LEFT)
+        self.engine_name = tk.StringVar(value=DEFAULT_ENGINE)
+        ttk.Combobox(
+            engine_frame, textvariable=self.engine_name, state='readonly',
+            values=[name for name in available_engines() if name != 'stub']
+        ).pack(side=tk.LEFT, fill=tk.X, expand=True)
+
         # Right-side video display and subtitle edit
         self.video_frame_label = tk.Label(self.right_frame)
         self.video_frame_label.pack()
@@ -394,6 +686,7 @@ class SubtitleEditorApp:
 
         # Initialize variables
         self.subtitles = None
+        self.srt_region = None  # {name: OCR range} the subtitles were read from, kept in the evidence
         self.video_path = None
         self.cap = None
         self.edited = tk.BooleanVar(value=False)
@@ -401,6 +694,21 @@ class SubtitleEditorApp:
             'w', lambda *args: self.info_text.configure(text='Unsaved' if self.edited.get() else 'Saved'))
         self.history = []
         self.last_selection_List = []
+        self.index = SubtitleIndex()
+        self.matches = []
+        self.filtered = None  # ids of the subtitles shown when filtering
+        self.view = None  # subtitle index of each listbox row when filtering
+        self.intervals = IntervalIndex()
+        self.coverage_runs = None
+        self.coverage_key = None
+        self.adjacency_colors = []
+        self.show_ranges = {}  # OCR region per show (video directory)
+        # worker threads never touch widgets; they post here and drain_progress runs on the Tk thread
+        self.channel = ProgressChannel()
+        self.meters = {}
+        self.scheduler = JobScheduler(on_update=self.channel.post)
+        self.job_window = None
+        self.root.after(PROGRESS_TICK_MS, self.drain_progress)
 
         # Enable drag-and-drop
         self.root.drop_target_register(DND_FILES)
@@ -415,6 +723,7 @@ class SubtitleEditorApp:
         self.listbox.bind('<Command-z>', self.undo)
         # self.listbox.bind('<Command-Shift-z>', self.redo)
         self.root.bind('<Command-s>', self.save_srt)
+        self.root.bind('<Command-f>', self.search_focus)
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
         # --- SeekBar ---
@@ -433,8 +742,16 @@ class SubtitleEditorApp:
             self.right_frame, text="00:00.000 / 00:00.000")
         self.timeline_time_label.pack()
 
-    def _update_status(self, text):
-        self.root.after(0, lambda: self.status_text.configure(text=text))
+    def select_ocr_range(self, cap, timeline_total_ms, show, video_path):
+        """Ask for the OCR region of a show, starting from the one used last time"""
+        initial = self.show_ranges.get(show)
+        # a new show is pre-filled with a band detected from the video instead of the wide default
+        selector = OCRRangeSelector(self.root, cap, timeline_total_ms, initial=initial,
+                                    video_path=video_path, channel=self.channel, detect=initial is None)
+        range_config = selector.show()
+        if range_config is not None:
+            self.show_ranges[show] = range_config
+        return range_config
 
     def extract_subtitles_with_ocr(self):
         if not self.cap:
@@ -442,9 +759,8 @@ class SubtitleEditorApp:
             return
 
         # Show OCR region selection dialog
-        selector = OCRRangeSelector(
-            self.root, self.cap, self.timeline_total_ms)
-        range_config = selector.show()
+        range_config = self.select_ocr_range(
+            self.cap, self.timeline_total_ms, os.path.dirname(self.video_path), self.video_path)
 
         if range_config is None:
             return  # User cancelled
@@ -452,57 +768,165 @@ class SubtitleEditorApp:
         # Save the selected region configuration
         self.ocr_range = range_config
 
-        thread = threading.Thread(target=self._ocr_worker)
-        thread.start()
-
-    def _ocr_worker(self):
-        global reader
-        if reader is None:
-            self._update_status('Loading OCR model...')
-            reader = easyocr.Reader(['ch_tra'])
-
-        # Use a separate VideoCapture instance to avoid conflict
-        cap = cv2.VideoCapture(self.video_path)
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        print(f'''\
-FPS: {fps}
-Frames: {total_frames}
-Duration: {timedelta(seconds=total_frames / fps)}\
-        ''')
-        logs = []
-        maker = SubtitleMaker()
-
-        cap.set(cv2.CAP_PROP_POS_MSEC, 0)
-        for i in (pbar := trange(total_frames, desc="Progress")):
-            ret, frame = cap.read()
-            if not ret:
-                break
-            if i % OCR_INTERVAL != 0:
+        # the first track goes to the editor; the others are written next to the video
+        [tracks_path] = self.choose_outputs(
+            [(os.path.splitext(self.video_path)[0] + '.srt', named_ranges(range_config), False)])
+        if tracks_path is None:
+            return
+
+        self.scheduler.submit(OCRJob(
+            self.video_path, range_config,
+            on_done=lambda job: self.channel.call(self.on_ocr_done, job),
+            engine=self.engine_name.get(), tracks_path=tracks_path))
+
+    def choose_outputs(self, outputs):
+        """Ask once what to do about jobs whose tracks would overwrite existing files
+
+        outputs holds (srt_path, names, first) for each job, as save_tracks
+        takes them. Returns the SRT path each job should write: the same one,
+        a free name next to it, or None to skip the job.
+        """
+        clashes = [existing_outputs(*output) for output in outputs]
+        found = [paths[0] for paths in clashes if paths]
+        if not found:
+            return [srt_path for srt_path, _, _ in outputs]
+        files = '\n'.join(os.path.basename(path) for path in found[:5])
+        if len(found) > 5:
+            files += f'\n... and {len(found) - 5} more'
+        overwrite = messagebox.askyesnocancel(
+            "Existing subtitles",
+            f"Subtitles already exist for {len(found)} of the videos:\n{files}\n\n"
+            "Yes: overwrite them\nNo: write new files next to them\nCancel: skip these videos")
+        chosen = []
+        for (srt_path, names, first), paths in zip(outputs, clashes):
+            if not paths or overwrite:
+                chosen.append(srt_path)
+            elif overwrite is None:
+                chosen.append(None)
+            else:
+                chosen.append(free_output_path(srt_path, names, first))
+        return chosen
+
+    def add_ocr_jobs(self, paths=None):
+        """Queue OCR jobs for several videos, writing an SRT next to each one"""
+        if paths is None:
+            paths = filedialog.askopenfilenames(
+                filetypes=[("Video files", " ".join(f"*{ext}" for ext in VIDEO_EXTENSIONS))])
+        paths = [path for path in paths if path.lower().endswith(VIDEO_EXTENSIONS)]
+        planned = []
+        skipped_shows = set()
+        for path in paths:
+            # videos in the same directory are treated as one show and share a region
+            show = os.path.dirname(path)
+            if show in skipped_shows:
                 continue
-            current_time = timedelta(
-                milliseconds=cap.get(cv2.CAP_PROP_POS_MSEC))
-            # clip the image to the region containing captions
-            frame = frame[int(frame.shape[0] * self.ocr_range['top']):int(frame.shape[0] * self.ocr_range['bottom']),
-                          int(frame.shape[1] * self.ocr_range['left']):int(frame.shape[1] * self.ocr_range['right']), :]
-            result = reader.readtext(frame, width_ths=0.2)
-            # sort by left to right
-            text = ' '.join([x[1] for x in result])
-            text = remove_strange_char(text).strip()
-            confidence = avg([fragment[2] for fragment in result])
-            logs.append(f'{current_time} {text} {confidence}')
-            pbar.set_description(text)
-            self._update_status(f'Frame {i}/{total_frames}: {text}')
-            maker.next_frame(current_time, text, confidence)
-
-        maker.end(timedelta(seconds=total_frames / fps))
-        self.subtitles = pysrt.SubRipFile(maker.get_subtitles())
+            if show not in self.show_ranges:
+                cap = cv2.VideoCapture(path)
+                fps = cap.get(cv2.CAP_PROP_FPS)
+                frame_count = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+                total_ms = int((frame_count / fps) * 1000) if fps else 0
+                range_config = self.select_ocr_range(cap, total_ms, show, path)
+                cap.release()
+                if range_config is None:
+                    skipped_shows.add(show)
+                    continue
+            planned.append((path, self.show_ranges[show]))
+        if not planned:
+            return
+        # asked once for the whole batch, after the regions are known
+        output_paths = self.choose_outputs(
+            [(os.path.splitext(path)[0] + '.srt', named_ranges(ocr_range), True)
+             for path, ocr_range in planned])
+        queued = False
+        for (path, ocr_range), output_path in zip(planned, output_paths):
+            if output_path is not None:
+                self.scheduler.submit(OCRJob(
+                    path, ocr_range, output_path=output_path, engine=self.engine_name.get()))
+                queued = True
+        if queued:
+            preload_engine(self.engine_name.get())
+            self.open_job_queue()
+
+    def open_job_queue(self):
+        if self.job_window is None:
+            self.job_window = JobQueueWindow(self.root, self.scheduler, self.open_job_result,
+                                             self.add_ocr_jobs)
+            for job in self.scheduler.jobs:
+                self.job_window.refresh(job)
+        self.job_window.show()
+
+    def drain_progress(self):
+        # re-armed first, so an exception in one update or call does not stop the tick for good
+        self.root.after(PROGRESS_TICK_MS, self.drain_progress)
+        jobs, calls = self.channel.drain()
+        for job in jobs:
+            self.on_job_update(job)
+        for fn, args in calls:
+            fn(*args)
+
+    def on_job_update(self, job):
+        speed = ''
+        if job.status == RUNNING and job.total_frames:
+            meter = self.meters.setdefault(job.id, RateMeter())
+            meter.update(job.frame)
+            eta = meter.eta(job.frame, job.total_frames)
+            if eta is not None:
+                speed = f'{meter.fps:.0f} fps, ETA {timedelta(seconds=int(eta))}'
+        elif job.finished:
+            self.meters.pop(job.id, None)
+
+        if self.job_window is not None:
+            self.job_window.refresh(job, speed)
+        if job.status == RUNNING and not job.total_frames:
+            self.status_text.configure(text=f'{job.name}: loading OCR model...')
+        elif job.status == RUNNING:
+            self.status_text.configure(
+                text=f'{job.name} frame {job.frame}/{job.total_frames} {speed}: {job.text}')
+        else:
+            self.status_text.configure(text=f'{job.name}: {job.status}')
+
+    def confirm_discard(self):
+        """Offer to save unsaved edits; False if the user cancels"""
+        if not self.edited.get():
+            return True
+        result = messagebox.askyesnocancel(
+            "Unsaved Changes",
+            "You have unsaved changes. Do you want to save them first?"
+        )
+        if result is None:
+            return False
+        if result:
+            self.save_srt()
+            # the save dialog may have been cancelled
+            return not self.edited.get()
+        return True
+
+    def on_ocr_done(self, job):
+        # the user may have moved on while the job waited in the queue;
+        # the result stays available through "Open in editor"
+        if job.video_path != self.video_path:
+            return
+        if self.confirm_discard():
+            self.load_ocr_result(job)
+
+    def open_job_result(self, job):
+        if not self.confirm_discard():
+            return
+        if job.video_path != self.video_path:
+            self.load_video(job.video_path)
+        if job.output_path and os.path.exists(job.output_path):
+            self.load_srt(job.output_path)
+        elif job.subtitles is not None:
+            self.load_ocr_result(job)
+
+    def load_ocr_result(self, job):
+        self.subtitles = job.subtitles
+        self.srt_region = dict([next(iter(named_ranges(job.ocr_range).items()))])
         self.srt_path = None
         self.srt_path_text.configure(text='srt not saved')
-        self.update_subtitle_list()
+        self.refresh_search()
         self.edited.set(True)
         self.history = []
-        self._update_status('')
 
     def draw_seekbar(self):
         self.timeline_canvas.delete("all")
@@ -512,12 +936,42 @@ Duration: {timedelta(seconds=total_frames / fps)}\
         self.timeline_canvas.create_rectangle(
             0, 8, width, 12, fill='darkgray', outline='')
 
+        # subtitle coverage, merged per pixel so the number of blocks is bounded by the width
+        if self.subtitles and self.timeline_total_ms:
+            key = (width, self.timeline_total_ms)
+            if key != self.coverage_key:
+                self.coverage_runs = self.intervals.coverage(self.timeline_total_ms, width)
+                self.coverage_key = key
+            for x0, x1, _, _ in self.coverage_runs:
+                self.timeline_canvas.create_rectangle(
+                    x0, 4, x1, 16, fill='steelblue', outline='')
+
         # current position
         self.timeline_canvas.create_line(
             self.seekbar_position, 0, self.seekbar_position, 20, fill='red', width=2)
 
     def on_timeline_press(self, event):
-        self.update_seekbar(event.x)
+        idx = self.subtitle_at_x(event.x)
+        if idx is None:
+            self.update_seekbar(event.x)
+            return
+        self.listbox.selection_clear(0, tk.END)
+        self.select_subtitle(idx)
+        self.display_subtitle(self.subtitles[idx])
+
+    def subtitle_at_x(self, x):
+        if not self.subtitles or not self.cap or self.timeline_total_ms == 0:
+            return None
+        width = self.timeline_canvas.winfo_width()
+        ms_per_pixel = self.timeline_total_ms / width
+        ms = x * ms_per_pixel
+        # a block may be a single pixel wide, so accept clicks next to it
+        candidates = self.intervals.at(ms) or self.intervals.between(
+            ms - 2 * ms_per_pixel, ms + 2 * ms_per_pixel)
+        if not candidates:
+            return None
+        return min(candidates, key=lambda i: abs(
+            (get_milliseconds(self.subtitles[i].start) + get_milliseconds(self.subtitles[i].end)) / 2 - ms))
 
     def on_timeline_drag(self, event):
         self.update_seekbar(event.x)
@@ -549,15 +1003,13 @@ Duration: {timedelta(seconds=total_frames / fps)}\
 
     def undo(self, event):
         if self.history:
-            indices = self.listbox.curselection()
+            indices = self.selected_indices()
             idx = indices[0] if indices else None
             self.subtitles = self.history.pop()
-            self.update_subtitle_list()
+            self.refresh_search()
             self.edited.set(True)
             if idx is not None:
-                self.listbox.selection_set(idx)
-                self.listbox.activate(idx)
-                self.listbox.see(idx)
+                self.select_subtitle(idx)
 
     def on_listbox_keypress(self, event):
         if event.char in ['e', 'ㄍ']:  # Bind 'e' key for editing
@@ -575,31 +1027,52 @@ Duration: {timedelta(seconds=total_frames / fps)}\
             self.rotate_selected_frame()
         elif event.char in [',', 'ㄝ']:
             self.add_comma()
+        elif event.char == '/':
+            return self.search_focus()
+        elif event.char in ['l', 'ㄠ']:
+            self.next_low_confidence()
+
+    def next_low_confidence(self):
+        queue = sorted(
+            (subtitle.evidence.confidence, i) for i, subtitle in enumerate(self.subtitles or [])
+            if getattr(subtitle, 'evidence', None) and subtitle.evidence.confidence < REVIEW_CONFIDENCE)
+        if not queue:
+            self.status_text.configure(text='No low-confidence subtitles')
+            return
+        indices = self.selected_indices()
+        position = 0
+        if indices:
+            current = (getattr(self.subtitles[indices[-1]], 'evidence', None), indices[-1])
+            if current[0] is not None:
+                key = (current[0].confidence, current[1])
+                position = next((n for n, item in enumerate(queue) if item > key), 0)
+        confidence, idx = queue[position]
+        self.listbox.selection_clear(0, tk.END)
+        self.select_subtitle(idx)
+        self.display_selected_frames()
+        self.status_text.configure(
+            text=f'Review {position + 1}/{len(queue)} (confidence {confidence:.2f})')
 
     def add_comma(self):
-        selected_indices = self.listbox.curselection()
+        selected_indices = self.selected_indices()
         if len(selected_indices) != 1:
             return
         idx = selected_indices[0]
         parts = self.subtitles[idx].text.split()
         self.subtitles[idx].text = '，'.join(parts)
         self.update_subtitle_list()
-        self.listbox.selection_set(idx)
-        self.listbox.activate(idx)
-        self.listbox.see(idx)
+        self.select_subtitle(idx)
         self.display_selected_frames()
 
     def rotate_selected_frame(self):
-        selected_indices = self.listbox.curselection()
+        selected_indices = self.selected_indices()
         if len(selected_indices) != 1:
             return
         idx = selected_indices[0]
         parts = self.subtitles[idx].text.split()
         self.subtitles[idx].text = ' '.join(parts[1:] + parts[:1])
         self.update_subtitle_list()
-        self.listbox.selection_set(idx)
-        self.listbox.activate(idx)
-        self.listbox.see(idx)
+        self.select_subtitle(idx)
         self.display_selected_frames()
 
     def listbox_focus(self, event=None):
@@ -616,20 +1089,21 @@ Duration: {timedelta(seconds=total_frames / fps)}\
         if self.srt_path:
             self.srt_path_text.configure(text=self.srt_path)
             self.subtitles = pysrt.open(self.srt_path)
-            self.update_subtitle_list()
+            load_evidence(self.subtitles, self.srt_path)
+            self.srt_region = load_region(self.srt_path)
+            self.refresh_search()
         self.edited.set(False)
         self.history = []
 
     def reload_srt(self, event=None):
         if messagebox.askyesno("Confirmation", "Are you sure you want to reload?"):
-            indices = self.listbox.curselection()
+            indices = self.selected_indices()
             self.subtitles = pysrt.open(self.srt_path)
-            self.update_subtitle_list()
+            load_evidence(self.subtitles, self.srt_path)
+            self.refresh_search()
             if indices:
                 idx = indices[0]
-                self.listbox.selection_set(idx)
-                self.listbox.activate(idx)
-                self.listbox.see(idx)
+                self.select_subtitle(idx)
             self.edited.set(False)
 
             self.info_text.configure(text='Reloaded!')
@@ -638,17 +1112,128 @@ Duration: {timedelta(seconds=total_frames / fps)}\
 
     def update_subtitle_list(self):
         self.listbox.delete(0, tk.END)
-        previous_end_time = None
-        for index, subtitle in enumerate(self.subtitles):
+        self.index.sync(self.subtitles)
+
+        if self.intervals.sync(self.subtitles):
+            self.coverage_key = None
+            self.adjacency_colors = [''] * len(self.subtitles)
+            for before, after, _ in self.intervals.gaps(ADJACENT_GAP_MS):
+                self.adjacency_colors[before] = 'lightpink' if self.adjacency_colors[before] == '' else 'lightyellow'
+                self.adjacency_colors[after] = 'lightyellow'
+            for a, b in self.intervals.overlaps():
+                self.adjacency_colors[a] = self.adjacency_colors[b] = 'orange'
+        colors = self.adjacency_colors
+
+        if self.filtered is None:
+            self.view = None
+            rows = range(len(self.subtitles))
+        else:
+            self.view = [i for i, subtitle in enumerate(self.subtitles)
+                         if id(subtitle) in self.filtered]
+            rows = self.view
+        for row, index in enumerate(rows):
+            subtitle = self.subtitles[index]
             time_range = f"{format_time(subtitle.start)} - {format_time(subtitle.end)}"
             self.listbox.insert(tk.END, f"{time_range}: {subtitle.text}")
-            if previous_end_time is not None and subtitle.start == previous_end_time:
-                if self.listbox.itemcget(index - 1, 'bg') == '':
-                    self.listbox.itemconfig(index - 1, {'bg': 'lightpink'})
-                else:
-                    self.listbox.itemconfig(index - 1, {'bg': 'lightyellow'})
-                self.listbox.itemconfig(index, {'bg': 'lightyellow'})
-            previous_end_time = subtitle.end
+            if colors[index]:
+                self.listbox.itemconfig(row, {'bg': colors[index]})
+        if self.cap:
+            self.draw_seekbar()
+
+    def selected_indices(self):
+        rows = self.listbox.curselection()
+        if self.view is None:
+            return rows
+        return tuple(self.view[row] for row in rows)
+
+    def select_subtitle(self, idx):
+        if self.view is None:
+            row = idx
+        elif idx in self.view:
+            row = self.view.index(idx)
+        else:
+            return
+        self.listbox.selection_set(row)
+        self.listbox.activate(row)
+        self.listbox.see(row)
+
+    def search_focus(self, event=None):
+        self.search_entry.focus_set()
+        self.search_entry.select_range(0, tk.END)
+        return 'break'
+
+    def find_matches(self):
+        query = self.search_var.get()
+        if not self.subtitles or not query:
+            return []
+        self.index.sync(self.subtitles)
+        return self.index.search(query, regex=self.search_regex.get())
+
+    def refresh_search(self, rebuild=True):
+        """Update the match count and the list
+
+        With rebuild=False, e.g. while typing a query, the list is only
+        rebuilt if the subtitles it shows change.
+        """
+        try:
+            self.matches = self.find_matches()
+        except re.error:
+            self.matches = []
+            self.search_count_text.configure(text='Invalid regex')
+        else:
+            self.search_count_text.configure(
+                text=f'{len(self.matches)} matches' if self.search_var.get() else '')
+
+        if self.search_filter.get() and self.search_var.get():
+            filtered = {id(self.subtitles[i]) for i in self.matches}
+        else:
+            filtered = None
+        if not rebuild and filtered == self.filtered:
+            return
+        self.filtered = filtered
+        if self.subtitles is not None:
+            indices = self.selected_indices()
+            self.update_subtitle_list()
+            if indices:
+                self.select_subtitle(indices[0])
+
+    def next_match(self, event=None):
+        if not self.matches:
+            return 'break'
+        indices = self.selected_indices()
+        current = indices[-1] if indices else -1
+        idx = next((i for i in self.matches if i > current), self.matches[0])
+        self.listbox.selection_clear(0, tk.END)
+        self.select_subtitle(idx)
+        self.display_selected_frames()
+        return 'break'
+
+    def replace_all(self):
+        try:
+            matches = self.find_matches()
+        except re.error:
+            messagebox.showerror("Error", "Invalid regular expression.")
+            return
+        if not matches:
+            return
+        query = self.search_var.get()
+        replacement = self.replace_var.get()
+        regex = self.search_regex.get()
+        # a bad template (e.g. \9 or \g<name>) fails here, before anything is changed
+        try:
+            replace_text(self.subtitles[matches[0]].text, query, replacement, regex)
+        except (re.error, IndexError) as e:
+            messagebox.showerror("Error", f"Invalid replacement: {e}")
+            return
+
+        self.history.append(copy.deepcopy(self.subtitles))
+        for i in matches:
+            self.subtitles[i].text = replace_text(
+                self.subtitles[i].text, query, replacement, regex)
+        self.edited.set(True)
+        self.refresh_search()
+        self.display_selected_frames()
+        self.status_text.configure(text=f'Replaced {len(matches)} subtitles')
 
     def load_video(self, path=None):
         # Load video file
@@ -663,9 +1248,10 @@ Duration: {timedelta(seconds=total_frames / fps)}\
             frame_count = self.cap.get(cv2.CAP_PROP_FRAME_COUNT)
             self.timeline_total_ms = int((frame_count / fps) * 1000)
             self.update_seekbar(0)
+            preload_engine(self.engine_name.get())
 
     def display_selected_frames(self, event=None):
-        indices = self.listbox.curselection()
+        indices = self.selected_indices()
         if not indices:
             return
         idx = indices[-1]
@@ -683,6 +1269,11 @@ Duration: {timedelta(seconds=total_frames / fps)}\
         if self.cap and self.subtitles:
             t = (get_milliseconds(subtitle.start) +
                  get_milliseconds(subtitle.end)) / 2
+            # jump to the frame the text was read from, if we know it
+            evidence = getattr(subtitle, 'evidence', None)
+            if evidence is not None and \
+                    get_milliseconds(subtitle.start) <= evidence.best_ms < get_milliseconds(subtitle.end):
+                t = evidence.best_ms
             self.cap.set(cv2.CAP_PROP_POS_MSEC, t)
             success, frame = self.cap.read()
             if not success:
@@ -712,19 +1303,24 @@ Duration: {timedelta(seconds=total_frames / fps)}\
                 )
 
     def drop_files(self, event):
-        file_path = event.data.strip('{}')  # Remove curly braces if present
-        if file_path.endswith('.srt'):
-            self.load_srt(file_path)
-        elif file_path.endswith('.mp4'):
-            self.load_video(file_path)
-        else:
-            messagebox.showerror(
-                "Error", "Unsupported file format. Please drop an .srt or .mp4 file.")
+        paths = self.root.tk.splitlist(event.data)
+        videos = [p for p in paths if p.lower().endswith(VIDEO_EXTENSIONS)]
+        for path in paths:
+            if path.lower().endswith('.srt'):
+                self.load_srt(path)
+            elif not path.lower().endswith(VIDEO_EXTENSIONS):
+                messagebox.showerror(
+                    "Error", "Unsupported file format. Please drop .srt, .mp4 or .webm files.")
+                return
+        if len(videos) == 1:
+            self.load_video(videos[0])
+        elif videos:
+            self.add_ocr_jobs(videos)
 
     def on_text_modified(self, event=None):
         if not self.subtitles:
             return
-        selected_indices = self.listbox.curselection()
+        selected_indices = self.selected_indices()
         if len(selected_indices) != 1:
             return
         idx = selected_indices[0]
@@ -735,12 +1331,10 @@ Duration: {timedelta(seconds=total_frames / fps)}\
                 self.edited.set(True)
                 self.subtitles[idx].text = new_text
                 self.update_subtitle_list()
-                self.listbox.selection_set(idx)
-                self.listbox.activate(idx)
-                self.listbox.see(idx)
+                self.select_subtitle(idx)
 
     def delete_subtitles(self, event=None):
-        selected_indices = self.listbox.curselection()
+        selected_indices = self.selected_indices()
         if not selected_indices:
             return
         self.history.append(copy.deepcopy(self.subtitles))
@@ -754,9 +1348,7 @@ Duration: {timedelta(seconds=total_frames / fps)}\
         if len(self.subtitles) > 0:
             new_selection_index = min(
                 min(selected_indices), len(self.subtitles) - 1)
-            self.listbox.selection_set(new_selection_index)
-            self.listbox.activate(new_selection_index)
-            self.listbox.see(new_selection_index)
+            self.select_subtitle(new_selection_index)
             self.display_selected_frames()  # Update display with new selection
         else:
             # Clear text and video frame if no subtitles left
@@ -764,20 +1356,22 @@ Duration: {timedelta(seconds=total_frames / fps)}\
             self.video_frame_label.configure(image='')
 
     def merge_subtitles(self, event=None):
-        indices = sorted(self.listbox.curselection())
+        indices = sorted(self.selected_indices())
         if len(indices) <= 1:
             return
         self.history.append(copy.deepcopy(self.subtitles))
         self.edited.set(True)
         end_time = self.subtitles[indices[-1]].end
+        # keep the least confident evidence so the merged line stays in the review queue
+        evidences = [e for i in indices if (e := getattr(self.subtitles[i], 'evidence', None))]
         for i in range(len(indices) - 1, 0, -1):
             del self.subtitles[indices[i]]
         self.subtitles[indices[0]].end = end_time
+        if evidences:
+            self.subtitles[indices[0]].evidence = min(evidences, key=lambda e: e.confidence)
 
         self.update_subtitle_list()
-        self.listbox.selection_set(indices[0])
-        self.listbox.activate(indices[0])
-        self.listbox.see(indices[0])
+        self.select_subtitle(indices[0])
         self.display_selected_frames()
 
     def save_srt(self, event=None):
@@ -793,6 +1387,7 @@ Duration: {timedelta(seconds=total_frames / fps)}\
             self.srt_path_text.configure(text=self.srt_path)
 
         self.subtitles.save(self.srt_path, encoding='utf-8')
+        save_evidence(self.subtitles, self.srt_path, self.srt_region)
         self.edited.set(False)
 
     def on_close(self):
@@ -0,0 +1,199 @@
+"""Export caption crops and their text as a sharded dataset.
+
+For every subtitle of a finished SRT the matching video frame is decoded,
+cropped to the OCR region and written with its text into tar shards in the
+WebDataset layout (`<key>.jpg`, `<key>.txt`, `<key>.json` per sample).
+Shards are written by worker processes, one shard at a time, so memory
+stays flat however long the season is. `manifest.jsonl` lists every sample
+and `index.json` every shard. Crops use the OCR region each track was
+extracted with, recorded in its evidence sidecar; --roi is only used for
+tracks without one.
+
+    python export.py out/ ep01.mp4 ep02.mp4 ... [--roi '{"top": 0.8, ...}'] [--workers 8]
+"""
+from multiprocessing import Pool
+import argparse
+import glob
+import io
+import json
+import os
+import re
+import tarfile
+import time
+import cv2
+import pysrt
+from tqdm import tqdm
+from utils import evidence_path, get_milliseconds, load_evidence, load_region
+from pipeline import crop_range, resolve_range
+from roi import REGION_NAME, named_ranges
+from metrics import Metrics
+
+SHARD_SIZE = 1000
+# decoding forward is cheaper than seeking for targets closer than this many frames
+SEEK_DISTANCE = 120
+
+
+def sample_times(subtitle, frames):
+    """Times in ms to take crops of a subtitle: its best-confidence frame, or evenly spread"""
+    start, end = get_milliseconds(subtitle.start), get_milliseconds(subtitle.end)
+    evidence = getattr(subtitle, 'evidence', None)
+    if frames == 1:
+        return [evidence.best_ms if evidence is not None else (start + end) // 2]
+    return [start + (end - start) * (k + 1) // (frames + 1) for k in range(frames)]
+
+
+def video_tracks(video_path, roi):
+    """(name, srt_path, ocr_range) of every track of a video to export
+
+    <video>.srt and each <video>.<name>.srt are cropped with the region
+    recorded in their evidence sidecar, or else with the one `roi` gives
+    (the first range for <video>.srt, the one of the same name otherwise).
+    """
+    base = os.path.splitext(video_path)[0]
+    paths = [base + '.srt'] + sorted(
+        path for path in glob.glob(glob.escape(base) + '.*.srt')
+        if REGION_NAME.fullmatch(path[len(base) + 1:-len('.srt')]))
+    fallback = None
+    tracks = []
+    for n, path in enumerate(paths):
+        if not os.path.exists(path):
+            print(f'{path} not found, skipping it')
+            continue
+        region = load_region(path)
+        if region is None:
+            if fallback is None:
+                fallback = named_ranges(resolve_range(video_path, roi, Metrics(video_path)))
+            name = next(iter(fallback)) if n == 0 else path[len(base) + 1:-len('.srt')]
+            if name not in fallback:
+                print(f'{path}: no OCR region in {evidence_path(path)} or --roi, skipping it; '
+                      f'pass region {name} in --roi')
+                continue
+            print(f'{path}: no OCR region in {evidence_path(path)}, using region {name} of --roi')
+            region = {name: fallback[name]}
+        [(name, ocr_range)] = region.items()
+        tracks.append((name, path, ocr_range))
+    return tracks
+
+
+def video_samples(video_path, tracks, frames):
+    """(time_ms, key, text, info) for every crop to export from a video, in time order"""
+    stem = re.sub(r'[^\w-]', '_', os.path.splitext(os.path.basename(video_path))[0])
+    samples = []
+    for name, path, ocr_range in tracks:
+        subtitles = pysrt.open(path, encoding='utf-8')
+        load_evidence(subtitles, path)
+        for index, subtitle in enumerate(subtitles):
+            if not subtitle.text.strip():
+                continue
+            for k, ms in enumerate(sample_times(subtitle, frames)):
+                # WebDataset splits keys at the first dot, so keys have none
+                key = f'{stem}_{name}_{index:06d}_{k}'
+                samples.append((ms, key, subtitle.text, {
+                    'video': video_path,
+                    'region': name,
+                    'ocr_range': ocr_range,
+                    'index': index,
+                    'start_ms': get_milliseconds(subtitle.start),
+                    'end_ms': get_milliseconds(subtitle.end),
+                    'ms': ms,
+                }))
+    samples.sort(key=lambda sample: sample[0])
+    return samples
+
+
+def write_shard(task):
+    """Decode, crop and write the samples of one shard; returns (shard, manifest rows)"""
+    shard_path, video_path, samples, image_format = task
+    shard = os.path.basename(shard_path)
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    position = -1
+    frame = None
+    rows = []
+    with tarfile.open(shard_path + '.tmp', 'w') as tar:
+        for ms, key, text, info in samples:
+            target = round(ms * fps / 1000)
+            # regions of one subtitle share a frame
+            if target != position - 1 or frame is None:
+                if target < position or target - position > SEEK_DISTANCE:
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, target)
+                    position = target
+                while position < target:
+                    cap.grab()
+                    position += 1
+                ret, frame = cap.read()
+                position += 1
+                if not ret:
+                    frame = None
+                    continue
+            ok, image = cv2.imencode(f'.{image_format}', crop_range(frame, info['ocr_range']))
+            if not ok:
+                continue
+            for name, data in ((f'{key}.{image_format}', image.tobytes()),
+                               (f'{key}.txt', text.encode('utf-8')),
+                               (f'{key}.json', json.dumps(info, ensure_ascii=False).encode('utf-8'))):
+                member = tarfile.TarInfo(name)
+                member.size = len(data)
+                member.mtime = 0
+                tar.addfile(member, io.BytesIO(data))
+            rows.append(dict(info, key=key, text=text, shard=shard))
+    cap.release()
+    os.replace(shard_path + '.tmp', shard_path)
+    return shard, rows
+
+
+def export_dataset(output_dir, videos, roi='auto', workers=None, shard_size=SHARD_SIZE, frames=1,
+                   image_format='jpg'):
+    """Write shards, manifest.jsonl and index.json for the subtitles of `videos`
+
+    `roi` ('auto', 'default' or JSON, as for pipeline.py) is only used for
+    tracks whose evidence sidecar has no OCR region.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    tasks = []
+    for video_path in videos:
+        samples = video_samples(video_path, video_tracks(video_path, roi), frames)
+        # shards never span videos, so a worker opens one video per shard
+        for i in range(0, len(samples), shard_size):
+            shard_path = os.path.join(output_dir, f'shard-{len(tasks):06d}.tar')
+            tasks.append((shard_path, video_path, samples[i:i + shard_size], image_format))
+
+    started = time.perf_counter()
+    shards = {}
+    total = 0
+    with Pool(workers) as pool, \
+            open(os.path.join(output_dir, 'manifest.jsonl'), 'w', encoding='utf-8') as manifest:
+        for shard, rows in tqdm(pool.imap_unordered(write_shard, tasks), total=len(tasks), desc='Shards'):
+            for row in rows:
+                manifest.write(json.dumps(row, ensure_ascii=False) + '\n')
+            shards[shard] = len(rows)
+            total += len(rows)
+    with open(os.path.join(output_dir, 'index.json'), 'w', encoding='utf-8') as f:
+        json.dump({'samples': total,
+                   'shards': [{'name': name, 'samples': shards[name]} for name in sorted(shards)]},
+                  f, indent=2)
+    elapsed = time.perf_counter() - started
+    print(f'{total} samples in {len(shards)} shards, {elapsed:.1f} s ({total / elapsed:.0f} samples/s)')
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export caption crops and text as tar shards')
+    parser.add_argument('output_dir')
+    parser.add_argument('videos', nargs='+', help='videos with a finished <video>.srt next to them')
+    parser.add_argument('--roi', default='auto',
+                        help='OCR region for tracks whose evidence sidecar does not record one: '
+                             "'auto', 'default', or JSON: one range, or named ranges matching the "
+                             '<video>.<name>.srt tracks')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--shard-size', type=int, default=SHARD_SIZE, help='samples per shard')
+    parser.add_argument('--frames', type=int, default=1,
+                        help='crops per subtitle; 1 takes the most confident OCR frame')
+    parser.add_argument('--format', choices=['jpg', 'png'], default='jpg')
+    args = parser.parse_args()
+    export_dataset(args.output_dir, args.videos, args.roi, args.workers, args.shard_size, args.frames,
+                   args.format)
+
+
+if __name__ == '__main__':
+    main()
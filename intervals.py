@@ -0,0 +1,116 @@
+from bisect import bisect_left, bisect_right
+from heapq import heappop, heappush
+
+from utils import get_milliseconds
+
+
+class IntervalIndex:
+    """Sorted index over subtitle [start, end) times in milliseconds.
+
+    Intervals are sorted by start time together with a running maximum of
+    the end times, so point queries only walk back over the intervals that
+    can still cover the point.
+    """
+
+    def __init__(self):
+        self.key = None
+        self.order = []  # subtitle index, sorted by start time
+        self.starts = []
+        self.ends = []
+        self.max_ends = []
+        self.max_end_positions = []
+
+    def sync(self, subtitles):
+        """Rebuild the index if any subtitle time changed"""
+        times = [(get_milliseconds(s.start), get_milliseconds(s.end)) for s in subtitles]
+        if times == self.key:
+            return False
+        self.key = times
+        self.order = sorted(range(len(times)), key=lambda i: times[i])
+        self.starts = [times[i][0] for i in self.order]
+        self.ends = [times[i][1] for i in self.order]
+        self.max_ends = []
+        self.max_end_positions = []
+        for i, end in enumerate(self.ends):
+            if not self.max_ends or end >= self.max_ends[-1]:
+                self.max_ends.append(end)
+                self.max_end_positions.append(i)
+            else:
+                self.max_ends.append(self.max_ends[-1])
+                self.max_end_positions.append(self.max_end_positions[-1])
+        return True
+
+    def __len__(self):
+        return len(self.order)
+
+    def at(self, ms):
+        """Subtitle indices on screen at the given time"""
+        result = []
+        i = bisect_right(self.starts, ms) - 1
+        while i >= 0 and self.max_ends[i] > ms:
+            if self.ends[i] > ms:
+                result.append(self.order[i])
+            i -= 1
+        return sorted(result)
+
+    def between(self, start_ms, end_ms):
+        """Subtitle indices intersecting [start_ms, end_ms)"""
+        result = []
+        hi = bisect_left(self.starts, end_ms)
+        i = hi - 1
+        while i >= 0 and self.max_ends[i] > start_ms:
+            if self.ends[i] > start_ms:
+                result.append(self.order[i])
+            i -= 1
+        return sorted(result)
+
+    def overlaps(self):
+        """Pairs of subtitle indices whose intervals overlap
+
+        A sweep in start order keeps the intervals still open in a heap by end
+        time, so one long interval costs a heap entry rather than a walk back
+        over everything it covers: O(n log n + pairs).
+        """
+        pairs = []
+        active = []  # (end, position) of intervals started before the current one
+        for j, start in enumerate(self.starts):
+            while active and active[0][0] <= start:
+                heappop(active)
+            for _, i in active:
+                pairs.append(tuple(sorted((self.order[i], self.order[j]))))
+            heappush(active, (self.ends[j], j))
+        return pairs
+
+    def gaps(self, max_gap_ms):
+        """(before, after, gap) for consecutive subtitles separated by less than max_gap_ms
+
+        A gap of 0 means the subtitles touch.
+        """
+        result = []
+        for j in range(1, len(self.order)):
+            gap = self.starts[j] - self.max_ends[j - 1]
+            if 0 <= gap < max_gap_ms:
+                before = self.order[self.max_end_positions[j - 1]]
+                result.append((before, self.order[j], gap))
+        return result
+
+    def coverage(self, total_ms, width):
+        """Merge intervals into pixel runs for a timeline of the given width
+
+        Returns (x0, x1, first, last) tuples where first/last are positions in
+        start order, so drawing cost is bounded by the width, not the number
+        of subtitles.
+        """
+        if not self.order or not total_ms or width <= 0:
+            return []
+        scale = width / total_ms
+        runs = []
+        for i, (start, end) in enumerate(zip(self.starts, self.ends)):
+            x0 = int(start * scale)
+            x1 = max(x0 + 1, int(end * scale))
+            if runs and x0 <= runs[-1][1]:
+                run = runs[-1]
+                runs[-1] = (run[0], max(run[1], x1), run[2], i)
+            else:
+                runs.append((x0, x1, i, i))
+        return runs
@@ -0,0 +1,178 @@
+import itertools
+import os
+import threading
+import traceback
+from metrics import Metrics, metrics_path
+from pipeline import extract_tracks, save_tracks
+
+PENDING = 'pending'
+RUNNING = 'running'
+PAUSED = 'paused'
+DONE = 'done'
+CANCELLED = 'cancelled'
+FAILED = 'failed'
+
+_job_ids = itertools.count(1)
+
+
+class OCRJob:
+    def __init__(self, video_path, ocr_range, output_path=None, on_done=None, engine=None,
+                 tracks_path=None):
+        """output_path: where the SRT is written when the job finishes, or None to keep it in memory
+
+        ocr_range: one OCR range, or a mapping of names to ranges for several
+        caption bands. `subtitles` is the first region's track and `tracks`
+        holds all of them; the other tracks are written next to output_path,
+        or when the first one is kept in memory, next to tracks_path (by
+        default <video>.srt, which itself is not written).
+        engine: name of the OCR engine to use, or None for the default
+        """
+        self.id = next(_job_ids)
+        self.video_path = video_path
+        self.ocr_range = ocr_range
+        self.engine = engine
+        self.output_path = output_path
+        self.tracks_path = tracks_path or os.path.splitext(video_path)[0] + '.srt'
+        self.on_done = on_done
+        self.status = PENDING
+        self.frame = 0
+        self.total_frames = 0
+        self.text = ''
+        self.error = None
+        self.subtitles = None
+        self.tracks = None
+        self.metrics = None
+        self._started = False
+        self._cancelled = False
+        self._resume = threading.Event()
+        self._resume.set()
+
+    @property
+    def name(self):
+        return os.path.basename(self.video_path)
+
+    @property
+    def progress(self):
+        return self.frame / self.total_frames if self.total_frames else 0
+
+    @property
+    def finished(self):
+        return self.status in (DONE, CANCELLED, FAILED)
+
+    def pause(self):
+        if not self.finished:
+            self._resume.clear()
+            self.status = PAUSED
+
+    def resume(self):
+        if self.status == PAUSED:
+            self.status = RUNNING if self._started else PENDING
+        self._resume.set()
+
+    def cancel(self):
+        self._cancelled = True
+        self._resume.set()
+        if not self._started and not self.finished:
+            self.status = CANCELLED
+
+    def _checkpoint(self):
+        self._resume.wait()
+        return not self._cancelled
+
+
+class JobScheduler:
+    """Run OCR jobs in order with at most `concurrency` running at once
+
+    All jobs share the one loaded model; decoding and cropping run in
+    parallel while model calls are serialized in the pipeline.
+    on_update(job) is called from worker threads whenever a job changes.
+    """
+
+    def __init__(self, concurrency=1, on_update=None):
+        self.concurrency = concurrency
+        self.on_update = on_update
+        self.jobs = []
+        self.lock = threading.Lock()
+
+    def submit(self, job):
+        with self.lock:
+            self.jobs.append(job)
+        self._notify(job)
+        self._dispatch()
+        return job
+
+    def set_concurrency(self, concurrency):
+        self.concurrency = max(1, concurrency)
+        self._dispatch()
+
+    def pause(self, job):
+        with self.lock:
+            job.pause()
+        self._notify(job)
+
+    def resume(self, job):
+        with self.lock:
+            job.resume()
+        self._notify(job)
+        self._dispatch()
+
+    def cancel(self, job):
+        with self.lock:
+            job.cancel()
+        self._notify(job)
+        self._dispatch()
+
+    def running(self):
+        return [job for job in self.jobs if job._started and not job.finished]
+
+    def _dispatch(self):
+        with self.lock:
+            active = len(self.running())
+            for job in self.jobs:
+                if active >= self.concurrency:
+                    break
+                if job.status == PENDING:
+                    job.status = RUNNING
+                    job._started = True
+                    threading.Thread(target=self._run, args=(job,), daemon=True).start()
+                    active += 1
+
+    def _run(self, job):
+        def on_progress(frame, total_frames, text):
+            job.frame = frame
+            job.total_frames = total_frames
+            job.text = text
+            self._notify(job)
+
+        job.metrics = Metrics(job.name)
+        try:
+            job.tracks = extract_tracks(
+                job.video_path, job.ocr_range, on_progress, job._checkpoint, job.metrics,
+                engine=job.engine)
+            if job.tracks is None:
+                job.status = CANCELLED
+            else:
+                job.subtitles = next(iter(job.tracks.values()))
+                if job.output_path:
+                    save_tracks(job.tracks, job.output_path, job.ocr_range)
+                else:
+                    # the first track goes to the editor; the others would be lost
+                    save_tracks(job.tracks, job.tracks_path, job.ocr_range, first=False)
+                job.frame = job.total_frames
+                job.status = DONE
+        except Exception as e:
+            traceback.print_exc()
+            job.error = str(e)
+            job.status = FAILED
+        try:
+            job.metrics.save(metrics_path(job.video_path))
+        except OSError:
+            traceback.print_exc()
+        self._notify(job)
+        if job.on_done is not None and job.status == DONE:
+            job.on_done(job)
+        self._dispatch()
+
+    def _notify(self, job):
+        if self.on_update is not None:
+            self.on_update(job)
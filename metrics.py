@@ -0,0 +1,197 @@
+"""Stage timing and counters for OCR runs.
+
+Compare two reports:
+
+    python metrics.py before.metrics.json after.metrics.json
+"""
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+import argparse
+import cProfile
+import json
+import os
+import platform
+import sys
+import time
+
+METRICS_VERSION = 1
+# upper bounds of the latency histogram buckets, in milliseconds
+BUCKETS_MS = [0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+# set to a directory to write a cProfile dump per video
+PROFILE_ENV = 'OCR_PROFILE_DIR'
+
+
+def metrics_path(video_path):
+    return os.path.splitext(video_path)[0] + '.metrics.json'
+
+
+def _round(ms):
+    return None if ms is None else round(ms, 3)
+
+
+class Histogram:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, ms):
+        self.count += 1
+        self.total += ms
+        self.min = ms if self.min is None else min(self.min, ms)
+        self.max = ms if self.max is None else max(self.max, ms)
+        self.buckets[bisect_left(BUCKETS_MS, ms)] += 1
+
+    def percentile(self, p):
+        """Upper bound of the bucket holding the p-th percentile"""
+        if not self.count:
+            return None
+        target = self.count * p / 100
+        seen = 0
+        for bound, n in zip(BUCKETS_MS + [self.max], self.buckets):
+            seen += n
+            if seen >= target:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'total_ms': round(self.total, 3),
+            'mean_ms': round(self.total / self.count, 3) if self.count else None,
+            'min_ms': _round(self.min),
+            'max_ms': _round(self.max),
+            'p50_ms': _round(self.percentile(50)),
+            'p95_ms': _round(self.percentile(95)),
+            'p99_ms': _round(self.percentile(99)),
+            'buckets': self.buckets,
+        }
+
+
+class Metrics:
+    """Per-stage latency histograms and counters for one OCR run"""
+
+    def __init__(self, name=''):
+        self.name = name
+        self.stages = {}
+        self.counters = Counter()
+        self.info = {}
+        self.started = time.perf_counter()
+        self.elapsed = None
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name, seconds):
+        histogram = self.stages.get(name)
+        if histogram is None:
+            histogram = self.stages[name] = Histogram()
+        histogram.add(seconds * 1000)
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self.started
+
+    def rate(self, hits, misses):
+        total = self.counters[hits] + self.counters[misses]
+        return self.counters[hits] / total if total else None
+
+    def report(self):
+        elapsed = self.elapsed if self.elapsed is not None else time.perf_counter() - self.started
+        frames = self.counters['frames_decoded']
+        sampled = self.counters['frames_sampled']
+        return {
+            'version': METRICS_VERSION,
+            'name': self.name,
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'host': {
+                'node': platform.node(),
+                'platform': platform.platform(),
+                'python': platform.python_version(),
+                'cpu_count': os.cpu_count(),
+            },
+            'info': self.info,
+            'elapsed_s': round(elapsed, 3),
+            'throughput': {
+                'frames_per_s': round(frames / elapsed, 2) if elapsed else None,
+                'sampled_frames_per_s': round(sampled / elapsed, 2) if elapsed else None,
+                'model_calls_per_s': round(self.counters['model_calls'] / elapsed, 2) if elapsed else None,
+            },
+            'rates': {
+                'skip_rate': round(1 - sampled / frames, 4) if frames else None,
+                'cache_hit_rate': self.rate('cache_hits', 'cache_misses'),
+            },
+            'counters': dict(self.counters),
+            'stages': {name: histogram.to_dict() for name, histogram in self.stages.items()},
+        }
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, ensure_ascii=False, indent=2)
+
+
+@contextmanager
+def profiled(video_path):
+    """Run the block under cProfile if OCR_PROFILE_DIR is set"""
+    directory = os.environ.get(PROFILE_ENV)
+    if not directory:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        os.makedirs(directory, exist_ok=True)
+        name = os.path.splitext(os.path.basename(video_path))[0]
+        profiler.dump_stats(os.path.join(directory, f'{name}.prof'))
+
+
+def compare(before, after, threshold=0.1):
+    """Print stage means side by side and return the stages that got slower"""
+    regressions = []
+    print(f'{"stage":<12}{"before ms":>12}{"after ms":>12}{"change":>10}')
+    for name in sorted(set(before['stages']) | set(after['stages'])):
+        a = (before['stages'].get(name) or {}).get('mean_ms')
+        b = (after['stages'].get(name) or {}).get('mean_ms')
+        if a and b:
+            change = (b - a) / a
+            flag = ' !' if change > threshold else ''
+            if flag:
+                regressions.append(name)
+            print(f'{name:<12}{a:>12.3f}{b:>12.3f}{change:>+9.1%}{flag}')
+        else:
+            print(f'{name:<12}{a or "-":>12}{b or "-":>12}')
+    for key in ('frames_per_s', 'sampled_frames_per_s'):
+        print(f'{key}: {before["throughput"][key]} -> {after["throughput"][key]}')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare two OCR metrics reports')
+    parser.add_argument('before')
+    parser.add_argument('after')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='relative slowdown of a stage mean reported as a regression')
+    args = parser.parse_args()
+    with open(args.before, encoding='utf-8') as f:
+        before = json.load(f)
+    with open(args.after, encoding='utf-8') as f:
+        after = json.load(f)
+    sys.exit(1 if compare(before, after, args.threshold) else 0)
+
+
+if __name__ == '__main__':
+    main()
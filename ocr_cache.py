@@ -0,0 +1,186 @@
+import os
+import sqlite3
+import threading
+import zlib
+import cv2
+import numpy as np
+from ocr_engines import CACHE_DIR
+from roi import EDGE_THRESHOLD
+
+CACHE_PATH = os.path.join(CACHE_DIR, 'ocr-cache.sqlite3')
+# bumped whenever signatures change; older tables are dropped on open
+CACHE_VERSION = 1
+HASH_BYTES = 8
+# the hash is indexed in this many 8-bit chunks; two hashes within
+# CHUNKS - 1 bits of each other share at least one chunk exactly
+CHUNKS = 8
+# stroke masks are compared at this size (width, height)
+MASK_SIZE = (384, 48)
+# crops with fewer stroke cells in the mask are not cached: no caption, or one
+# the mask cannot see (e.g. dark text), whose text the mask cannot vouch for
+MIN_STROKES = 40
+# caption fill is near white; bright scenery below this stays out of the mask
+FILL_THRESHOLD = 230
+
+
+def stroke_mask(image):
+    """Fraction of caption stroke pixels in each cell of a crop shrunk to MASK_SIZE
+
+    Only near-white pixels next to a strong edge count, so the mask follows
+    the glyphs and not the scene behind them. Edges are taken both ways:
+    letters like L and F differ only in their horizontal bars.
+    """
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    edges = np.zeros(image.shape, np.uint8)
+    cv2.absdiff(image[:, 1:], image[:, :-1], dst=edges[:, 1:])
+    vertical = np.zeros(image.shape, np.uint8)
+    cv2.absdiff(image[1:], image[:-1], dst=vertical[1:])
+    cv2.max(edges, vertical, dst=edges)
+    kernel = np.ones((3, 3), np.uint8)
+    strokes = (image >= FILL_THRESHOLD) & (cv2.dilate(edges, kernel) >= EDGE_THRESHOLD)
+    return cv2.resize(strokes.astype(np.float32), MASK_SIZE, interpolation=cv2.INTER_AREA)
+
+
+def mask_hash(mask):
+    """64-bit perceptual hash of a stroke mask, used to find candidate entries"""
+    low = cv2.dct(mask)[:4, :16].ravel()
+    bits = low > np.median(low[1:])
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def mask_distance(a, b):
+    """Largest share of strokes differing between two masks in any window a third of a line high
+
+    JPEG noise moves a few strokes everywhere; another glyph moves most of
+    the strokes in one place, however long the rest of the line is. Cubing
+    lets whole strokes outweigh cells flickering at glyph edges.
+    """
+    size = (a.shape[0] // 3, a.shape[0] // 3)
+    diff = cv2.blur(np.abs(a - b) ** 3, size, borderType=cv2.BORDER_CONSTANT)
+    mass = cv2.blur(np.maximum(a, b) ** 3, size, borderType=cv2.BORDER_CONSTANT)
+    return float((diff / np.maximum(mass, mass.max() * 0.25)).max())
+
+
+def pack_mask(mask):
+    return zlib.compress(np.round(mask * 255).astype(np.uint8).tobytes())
+
+
+def unpack_mask(data):
+    mask = np.frombuffer(zlib.decompress(data), np.uint8).astype(np.float32) / 255
+    return mask.reshape(MASK_SIZE[1], MASK_SIZE[0])
+
+
+def signature(image):
+    """(hash, packed stroke mask) of a caption crop, or None if it should not be cached"""
+    mask = stroke_mask(image)
+    if np.count_nonzero(mask >= 0.25) < MIN_STROKES:
+        return None
+    return mask_hash(mask), pack_mask(mask)
+
+
+def chunks(value):
+    return [(value >> (8 * i)) & 0xff for i in range(CHUNKS)]
+
+
+class OCRCache:
+    """Recognized text of caption crops, looked up by stroke mask
+
+    Entries are kept per engine in a SQLite file, so every job, video and run
+    on the machine shares them. Candidates are found by a perceptual hash of
+    the crop's stroke mask within `max_distance` bits; a candidate is only
+    used if no glyph-sized window of its mask differs from the crop's in more
+    than `tolerance` of its strokes, so a line that differs by one character
+    is not returned. The least recently used entries are dropped once there
+    are more than `max_entries`.
+    """
+
+    def __init__(self, path=CACHE_PATH, max_entries=200000, max_distance=7, tolerance=0.08,
+                 flush_every=200):
+        if max_distance >= CHUNKS:
+            raise ValueError(f'max_distance must be below {CHUNKS}')
+        self.path = path
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.tolerance = tolerance
+        self.flush_every = flush_every
+        self.lock = threading.Lock()
+        self.pending = 0
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        if self.db.execute('PRAGMA user_version').fetchone()[0] != CACHE_VERSION:
+            self.db.execute('DROP TABLE IF EXISTS entries')
+            self.db.execute(f'PRAGMA user_version = {CACHE_VERSION}')
+        columns = ', '.join(f'c{i} INTEGER' for i in range(CHUNKS))
+        self.db.execute(f'CREATE TABLE IF NOT EXISTS entries (engine TEXT, hash BLOB, {columns}, '
+                        'mask BLOB, text TEXT, confidence REAL, used INTEGER)')
+        for i in range(CHUNKS):
+            self.db.execute(f'CREATE INDEX IF NOT EXISTS entries_c{i} ON entries (c{i})')
+        self.db.execute('CREATE INDEX IF NOT EXISTS entries_used ON entries (used)')
+        self.clock = self.db.execute('SELECT COALESCE(MAX(used), 0) FROM entries').fetchone()[0]
+        self.db.commit()
+
+    def tick(self):
+        self.clock += 1
+        return self.clock
+
+    def get(self, engine, signature):
+        """(text, confidence) stored for a crop with this signature, or None"""
+        key, packed = signature
+        mask = None
+        where = ' OR '.join(f'c{i} = ?' for i in range(CHUNKS))
+        with self.lock:
+            rows = self.db.execute(f'SELECT rowid, hash FROM entries WHERE engine = ? AND ({where})',
+                                   [engine] + chunks(key)).fetchall()
+            candidates = []
+            for rowid, value in rows:
+                distance = (key ^ int.from_bytes(value, 'big')).bit_count()
+                if distance <= self.max_distance:
+                    candidates.append((distance, rowid))
+            for _, rowid in sorted(candidates):
+                stored, text, confidence = self.db.execute(
+                    'SELECT mask, text, confidence FROM entries WHERE rowid = ?', (rowid,)).fetchone()
+                if mask is None:
+                    mask = unpack_mask(packed)
+                if mask_distance(mask, unpack_mask(stored)) <= self.tolerance:
+                    self.db.execute('UPDATE entries SET used = ? WHERE rowid = ?', (self.tick(), rowid))
+                    self._written()
+                    return text, confidence
+            return None
+
+    def put(self, engine, signature, text, confidence):
+        key, mask = signature
+        with self.lock:
+            self.db.execute(
+                f'INSERT INTO entries VALUES (?, ?, {", ".join("?" * CHUNKS)}, ?, ?, ?, ?)',
+                [engine, key.to_bytes(HASH_BYTES, 'big')] + chunks(key) + [mask, text, confidence, self.tick()])
+            self._written()
+
+    def _written(self):
+        self.pending += 1
+        if self.pending >= self.flush_every:
+            self._flush()
+
+    def _flush(self):
+        count = self.db.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+        if count > self.max_entries:
+            # evict a tenth at a time so eviction does not run on every insert
+            excess = count - self.max_entries + self.max_entries // 10
+            self.db.execute('DELETE FROM entries WHERE rowid IN '
+                            '(SELECT rowid FROM entries ORDER BY used LIMIT ?)', (excess,))
+        self.db.commit()
+        self.pending = 0
+
+    def flush(self):
+        with self.lock:
+            self._flush()
+
+    def __len__(self):
+        with self.lock:
+            return self.db.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+
+    def close(self):
+        self.flush()
+        self.db.close()
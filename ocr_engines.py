@@ -0,0 +1,231 @@
+import hashlib
+import importlib.util
+import os
+import threading
+import time
+import numpy as np
+
+DEFAULT_ENGINE = 'easyocr'
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'ocr-subtitle-editor')
+
+
+class OCREngine:
+    """Recognizes the text in a caption crop
+
+    Subclasses declare what they can do so the pipeline can adapt its input:
+    supports_batching: read_batch reads all images in one model call
+    detection_free: recognizes a single text line without a detection pass
+    preferred_height: text height in pixels the recognizer works best at, or None
+    grayscale: accepts single-channel images
+    """
+    name = None
+    supports_batching = False
+    detection_free = False
+    preferred_height = None
+    grayscale = False
+
+    def __init__(self):
+        # model calls are serialized when several jobs share one engine
+        self.lock = threading.Lock()
+        # model calls made so far; read and read_batch add the ones they make
+        self.calls = 0
+
+    def load(self):
+        """Load model weights; called once before the first read"""
+
+    def read(self, image):
+        """Return [(text, confidence), ...] fragments, left to right"""
+        raise NotImplementedError
+
+    def read_batch(self, images):
+        return [self.read(image) for image in images]
+
+
+class EasyOCREngine(OCREngine):
+    name = 'easyocr'
+    supports_batching = True
+    preferred_height = 64
+    grayscale = True
+
+    def __init__(self, languages=('ch_tra',), gpu=True):
+        super().__init__()
+        self.languages = list(languages)
+        self.gpu = gpu
+        self.reader = None
+
+    def load(self):
+        if self.reader is None:
+            # easyocr pulls in torch, which takes seconds to import
+            import easyocr
+            self.reader = easyocr.Reader(self.languages, gpu=self.gpu)
+
+    def read(self, image):
+        self.calls += 1
+        result = self.reader.readtext(image, width_ths=0.2)
+        return [(fragment[1], fragment[2]) for fragment in result]
+
+    def read_batch(self, images):
+        # readtext_batched stacks its inputs, so crops are padded with black to a common
+        # canvas; resizing them instead would undo the text height they were scaled to
+        height = max(image.shape[0] for image in images)
+        width = max(image.shape[1] for image in images)
+        canvases = []
+        for image in images:
+            canvas = np.zeros((height, width) + image.shape[2:], image.dtype)
+            canvas[:image.shape[0], :image.shape[1]] = image
+            canvases.append(canvas)
+        self.calls += 1
+        batch = self.reader.readtext_batched(canvases, width_ths=0.2)
+        return [[(fragment[1], fragment[2]) for fragment in result] for result in batch]
+
+
+class EasyOCRCPUEngine(EasyOCREngine):
+    """EasyOCR tuned for machines without a GPU
+
+    Detector and recognizer are int8 dynamically quantized (EasyOCR's own
+    CPU quantization, which stock easyocr.Reader(gpu=False) applies too, so
+    inference is no faster), and the converted modules are cached on disk so
+    later loads skip building and quantizing them. Torch intra-op threads are
+    pinned to `threads` (OCR_THREADS), by default the cores split between the
+    `workers` OCR processes on the node (OCR_WORKERS, default 1), so they
+    share the cores instead of oversubscribing them.
+    """
+    name = 'easyocr-cpu'
+
+    def __init__(self, languages=('ch_tra',), threads=None, workers=None, cache_dir=CACHE_DIR):
+        super().__init__(languages, gpu=False)
+        workers = workers or int(os.environ.get('OCR_WORKERS', 0)) or 1
+        self.threads = threads or int(os.environ.get('OCR_THREADS', 0)) or max(1, (os.cpu_count() or 1) // workers)
+        self.cache_dir = cache_dir
+
+    def cache_path(self):
+        import easyocr
+        import torch
+        key = f'{easyocr.__version__}-{torch.__version__}-{"+".join(self.languages)}'
+        digest = hashlib.sha1(key.encode()).hexdigest()[:12]
+        return os.path.join(self.cache_dir, f'easyocr-int8-{digest}.pt')
+
+    def load(self):
+        if self.reader is not None:
+            return
+        import easyocr
+        import torch
+        torch.set_num_threads(self.threads)
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            pass  # can only be set before torch runs any parallel work
+
+        path = self.cache_path()
+        if os.path.exists(path):
+            try:
+                # the cached modules replace the ones Reader would build and quantize
+                from easyocr.detection import get_textbox
+                reader = easyocr.Reader(self.languages, gpu=False, detector=False, recognizer=False)
+                reader.detect_network = 'craft'
+                reader.get_textbox = get_textbox
+                cached = torch.load(path, weights_only=False)
+                reader.detector = cached['detector']
+                reader.recognizer = cached['recognizer']
+                reader.converter = cached['converter']
+                self.reader = reader
+                return
+            except Exception:
+                os.remove(path)
+
+        self.reader = easyocr.Reader(self.languages, gpu=False, quantize=True)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        torch.save({'detector': self.reader.detector,
+                    'recognizer': self.reader.recognizer,
+                    'converter': self.reader.converter}, path + '.tmp')
+        os.replace(path + '.tmp', path)
+
+
+class TesseractEngine(OCREngine):
+    """Tesseract via pytesseract, reading the crop as a single text line
+
+    Much cheaper than EasyOCR on CPU. Needs the tesseract binary and the
+    traineddata for `lang` installed.
+    """
+    name = 'tesseract'
+    detection_free = True
+    preferred_height = 48
+    grayscale = True
+
+    def __init__(self, lang='chi_tra', psm=7):
+        super().__init__()
+        self.lang = lang
+        self.config = f'--psm {psm}'
+        self.pytesseract = None
+
+    def load(self):
+        if self.pytesseract is None:
+            import pytesseract
+            # fails early if the tesseract binary is missing
+            pytesseract.get_tesseract_version()
+            self.pytesseract = pytesseract
+
+    def read(self, image):
+        self.calls += 1
+        data = self.pytesseract.image_to_data(
+            image, lang=self.lang, config=self.config, output_type=self.pytesseract.Output.DICT)
+        # Chinese comes back one word per character; join words within a block
+        # and keep blocks apart like EasyOCR fragments
+        blocks = {}
+        for text, conf, block in zip(data['text'], data['conf'], data['block_num']):
+            conf = float(conf)
+            if text.strip() and conf >= 0:
+                blocks.setdefault(block, []).append((text.strip(), conf / 100))
+        return [(''.join(t for t, _ in words), sum(c for _, c in words) / len(words))
+                for _, words in sorted(blocks.items())]
+
+
+class StubEngine(OCREngine):
+    """Deterministic engine for benchmarks and tests
+
+    read_fn(image) returns the fragments for an image; delay_ms simulates
+    the latency of one model call, which reads a whole batch when
+    supports_batching is set. Capabilities can be overridden to mimic other
+    engines.
+    """
+    name = 'stub'
+    supports_batching = True
+    detection_free = True
+    grayscale = True
+
+    def __init__(self, read_fn=None, delay_ms=0, **capabilities):
+        super().__init__()
+        self.read_fn = read_fn or (lambda image: [])
+        self.delay_ms = delay_ms
+        for key, value in capabilities.items():
+            setattr(self, key, value)
+
+    def read(self, image):
+        self.calls += 1
+        if self.delay_ms:
+            time.sleep(self.delay_ms / 1000)
+        return self.read_fn(image)
+
+    def read_batch(self, images):
+        if not self.supports_batching:
+            return super().read_batch(images)
+        self.calls += 1
+        if self.delay_ms:
+            time.sleep(self.delay_ms / 1000)
+        return [self.read_fn(image) for image in images]
+
+
+ENGINES = {engine.name: engine for engine in (EasyOCREngine, EasyOCRCPUEngine, TesseractEngine, StubEngine)}
+# module each engine needs, so availability can be checked without importing it
+REQUIREMENTS = {'easyocr': 'easyocr', 'easyocr-cpu': 'easyocr', 'tesseract': 'pytesseract'}
+
+
+def available_engines():
+    return [name for name in ENGINES
+            if name not in REQUIREMENTS or importlib.util.find_spec(REQUIREMENTS[name])]
+
+
+def create_engine(name, **options):
+    if name not in ENGINES:
+        raise ValueError(f'Unknown OCR engine: {name}')
+    return ENGINES[name](**options)
@@ -0,0 +1,318 @@
+from datetime import timedelta
+import argparse
+import json
+import os
+import threading
+import cv2
+import pysrt
+from tqdm import trange
+from utils import *
+from metrics import Metrics, metrics_path, profiled
+from ocr_engines import DEFAULT_ENGINE, OCREngine, create_engine
+from preprocess import ROIPreprocessor
+from ocr_cache import OCRCache, signature
+from roi import DEFAULT_RANGE, DEFAULT_TRACK, detect_caption_region, named_ranges
+
+OCR_INTERVAL = 3
+# largest enlargement of crops for engines that read a text line without detecting it first
+MAX_UPSCALE = 1.5
+
+# engine used when a job does not pick one; can be overridden with OCR_ENGINE
+DEFAULT_ENGINE = os.environ.get('OCR_ENGINE', DEFAULT_ENGINE)
+
+# contrast step before OCR: None, 'normalize' or 'binarize' (for outlined captions)
+CONTRAST = os.environ.get('OCR_CONTRAST') or None
+
+# the shared OCR cache is off unless OCR_CACHE is set: 1 for the default file, or a path
+CACHE_PATH = os.environ.get('OCR_CACHE')
+
+engines = {}
+engines_lock = threading.Lock()
+shared_cache = None
+
+
+def get_engine(name=None):
+    """Return the shared engine with this name, loading it on first use"""
+    name = name or DEFAULT_ENGINE
+    with engines_lock:
+        engine = engines.get(name)
+        if engine is None:
+            engine = create_engine(name)
+            engine.load()
+            engines[name] = engine
+    return engine
+
+
+def set_engine(engine):
+    """Register an engine instance, e.g. a StubEngine, under its name"""
+    with engines_lock:
+        engines[engine.name] = engine
+
+
+def preload_engine(name=None):
+    """Warm up the OCR model in the background"""
+    if (name or DEFAULT_ENGINE) not in engines:
+        threading.Thread(target=get_engine, args=(name,), daemon=True).start()
+
+
+def get_cache():
+    """Return the OCR cache shared by every job, or None if caching is off"""
+    global shared_cache
+    if not CACHE_PATH or CACHE_PATH == '0':
+        return None
+    with engines_lock:
+        if shared_cache is None:
+            shared_cache = OCRCache() if CACHE_PATH == '1' else OCRCache(CACHE_PATH)
+    return shared_cache
+
+
+def crop_range(frame, ocr_range):
+    height, width = frame.shape[:2]
+    return frame[int(height * ocr_range['top']):int(height * ocr_range['bottom']),
+                 int(width * ocr_range['left']):int(width * ocr_range['right'])]
+
+
+def extract_subtitles(video_path, ocr_range, on_progress=None, should_continue=None, metrics=None,
+                      engine=None, contrast=CONTRAST, cache=True):
+    """Run OCR over one region of a video and return the recognized subtitles
+
+    See extract_tracks for the arguments.
+    """
+    tracks = extract_tracks(video_path, {DEFAULT_TRACK: ocr_range}, on_progress, should_continue,
+                            metrics, engine, contrast, cache)
+    return tracks[DEFAULT_TRACK] if tracks is not None else None
+
+
+def extract_tracks(video_path, ocr_ranges, on_progress=None, should_continue=None, metrics=None,
+                   engine=None, contrast=CONTRAST, cache=True):
+    """Run OCR over several regions of a video and return {name: subtitles}
+
+    `ocr_ranges` is an OCR range or a mapping of names to ranges. Each frame
+    is decoded once and the crops of all regions go to the engine in one
+    batch; every region gets its own subtitle track.
+
+    on_progress(frame_index, total_frames, text) is called for every sampled
+    frame with the text of the first region. should_continue() is called
+    before every frame; it may block (to pause) and returns False to cancel,
+    in which case None is returned.
+    Stage timings and counters are recorded into `metrics` if given.
+    `engine` is an OCREngine or the name of a registered one. Crops are
+    rescaled to the engine's preferred text height and, if `contrast` is set,
+    normalized or binarized before OCR. Crops close to one recognized before
+    reuse its text from `cache`: True for the shared cache (if OCR_CACHE
+    enables it), False for none, or an OCRCache.
+    """
+    metrics = metrics or Metrics(video_path)
+    if cache is True:
+        cache = get_cache()
+    elif cache is False:
+        cache = None
+    with profiled(video_path):
+        try:
+            return _extract_tracks(video_path, named_ranges(ocr_ranges), on_progress, should_continue,
+                                   metrics, engine, contrast, cache)
+        finally:
+            metrics.finish()
+
+
+def _extract_tracks(video_path, ocr_ranges, on_progress, should_continue, metrics, engine, contrast, cache):
+    with metrics.stage('model_load'):
+        if not isinstance(engine, OCREngine):
+            engine = get_engine(engine)
+        engine.load()
+    names = list(ocr_ranges)
+    ranges = list(ocr_ranges.values())
+    # a detection pass costs more with every pixel, so crops are only enlarged for engines without one
+    max_scale = MAX_UPSCALE if engine.detection_free else 1.0
+    # one preprocessor per region: each keeps the scale and buffers of its crop size
+    preprocessors = [ROIPreprocessor(engine.preferred_height, engine.grayscale, contrast, max_scale=max_scale)
+                     for _ in names]
+
+    # Use a separate VideoCapture instance to avoid conflict
+    with metrics.stage('open'):
+        cap = cv2.VideoCapture(video_path)
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    print(f'''\
+Video: {video_path}
+FPS: {fps}
+Frames: {total_frames}
+Duration: {timedelta(seconds=total_frames / fps)}\
+        ''')
+    metrics.info.update({
+        'video': video_path,
+        'fps': fps,
+        'total_frames': total_frames,
+        'width': int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        'height': int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        'ocr_interval': OCR_INTERVAL,
+        'engine': engine.name,
+        'contrast': contrast,
+        'ocr_range': ocr_ranges,
+    })
+    makers = [SubtitleMaker() for _ in names]
+
+    with metrics.stage('seek'):
+        cap.set(cv2.CAP_PROP_POS_MSEC, 0)
+    try:
+        for i in (pbar := trange(total_frames, desc="Progress")):
+            if should_continue is not None and not should_continue():
+                metrics.count('cancelled')
+                return None
+            with metrics.stage('decode'):
+                ret, frame = cap.read()
+            if not ret:
+                break
+            metrics.count('frames_decoded')
+            if i % OCR_INTERVAL != 0:
+                continue
+            metrics.count('frames_sampled')
+            current_time = timedelta(
+                milliseconds=cap.get(cv2.CAP_PROP_POS_MSEC))
+            # clip the image to the regions containing captions
+            with metrics.stage('crop'):
+                crops = [crop_range(frame, ocr_range) for ocr_range in ranges]
+            results = [None] * len(crops)
+            signatures = [None] * len(crops)
+            if cache is not None:
+                # signed before preprocessing, whose scale settles over the first captions
+                with metrics.stage('cache'):
+                    for j, crop in enumerate(crops):
+                        signatures[j] = signature(crop)
+                        if signatures[j] is None:
+                            metrics.count('cache_skipped')
+                            continue
+                        results[j] = cache.get(engine.name, signatures[j])
+                        metrics.count('cache_hits' if results[j] is not None else 'cache_misses')
+            with metrics.stage('preprocess'):
+                crops = [preprocess(crop) for preprocess, crop in zip(preprocessors, crops)]
+            missing = [j for j, result in enumerate(results) if result is None]
+            if missing:
+                with engine.lock:
+                    calls = engine.calls
+                    with metrics.stage('ocr'):
+                        if len(missing) == 1:
+                            batch = [engine.read(crops[missing[0]])]
+                        else:
+                            batch = engine.read_batch([crops[j] for j in missing])
+                    metrics.count('model_calls', engine.calls - calls)
+                for j, result in zip(missing, batch):
+                    # fragments are ordered left to right
+                    text = ' '.join([fragment[0] for fragment in result])
+                    text = remove_strange_char(text).strip()
+                    results[j] = (text, avg([fragment[1] for fragment in result]))
+                    if signatures[j] is not None:
+                        cache.put(engine.name, signatures[j], *results[j])
+            text = results[0][0]
+            # the bar redraws on its own schedule; refreshing here would redraw every frame
+            pbar.set_description(text, refresh=False)
+            if on_progress is not None:
+                on_progress(i, total_frames, text)
+            with metrics.stage('maker'):
+                for maker, (text, confidence) in zip(makers, results):
+                    maker.next_frame(current_time, text, confidence, frame_index=i)
+    finally:
+        cap.release()
+        if cache is not None:
+            cache.flush()
+
+    tracks = {}
+    for name, maker, preprocessor in zip(names, makers, preprocessors):
+        maker.end(timedelta(seconds=total_frames / fps))
+        tracks[name] = pysrt.SubRipFile(maker.get_subtitles())
+        metrics.info.setdefault('text_height', {})[name] = preprocessor.text_height
+        metrics.info.setdefault('scale', {})[name] = preprocessor.scale
+        metrics.count('subtitles', len(tracks[name]))
+    return tracks
+
+
+def track_paths(srt_path, names, first=True):
+    """SRT path of each named track: the first at srt_path, the others next to it
+
+    With first=False the first track is left out.
+    """
+    return {name: srt_path if n == 0 else track_path(srt_path, name)
+            for n, name in enumerate(names) if n or first}
+
+
+def save_tracks(tracks, srt_path, ocr_ranges, first=True):
+    """Write the first track to srt_path and the others next to it, with their evidence
+
+    Each track's region from `ocr_ranges` (as passed to extract_tracks) is
+    recorded in its evidence sidecar. With first=False only the other tracks
+    are written.
+    """
+    ocr_ranges = named_ranges(ocr_ranges)
+    for name, path in track_paths(srt_path, tracks, first).items():
+        tracks[name].save(path, encoding='utf-8')
+        save_evidence(tracks[name], path, {name: ocr_ranges[name]})
+
+
+def existing_outputs(srt_path, names, first=True):
+    """Files save_tracks would overwrite: the SRTs and evidence sidecars already there"""
+    return [path for srt in track_paths(srt_path, names, first).values()
+            for path in (srt, evidence_path(srt)) if os.path.exists(path)]
+
+
+def free_output_path(srt_path, names, first=True):
+    """`<name> (n).srt` next to srt_path for the lowest n whose tracks would overwrite nothing"""
+    base, ext = os.path.splitext(srt_path)
+    n = 1
+    while existing_outputs(f'{base} ({n}){ext}', names, first):
+        n += 1
+    return f'{base} ({n}){ext}'
+
+
+def resolve_range(video_path, roi, metrics):
+    """OCR range for a video from --roi: 'auto', 'default' or JSON (one range or named ranges)"""
+    if roi == 'default':
+        return DEFAULT_RANGE
+    if roi != 'auto':
+        ocr_range = json.loads(roi)
+        # fails before any video is read if a region name is unfit for a file name
+        named_ranges(ocr_range)
+        return ocr_range
+    with metrics.stage('roi_detect'):
+        cap = cv2.VideoCapture(video_path)
+        try:
+            ocr_range = detect_caption_region(cap)
+        finally:
+            cap.release()
+    if ocr_range is None:
+        print(f'{video_path}: no captions detected, using the default region')
+        return DEFAULT_RANGE
+    return ocr_range
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Extract subtitles without the editor')
+    parser.add_argument('videos', nargs='+')
+    parser.add_argument('--roi', default='auto',
+                        help="'auto' to detect the caption band (default), 'default', "
+                             'or a JSON object like {"top": 0.8, "bottom": 0.95, "left": 0.1, "right": 0.9}; '
+                             'a JSON object of named ranges writes one SRT per region')
+    parser.add_argument('--engine', default=DEFAULT_ENGINE)
+    parser.add_argument('--contrast', choices=['normalize', 'binarize'], default=CONTRAST)
+    parser.add_argument('--workers', type=int,
+                        help='pipeline.py processes sharing this machine (OCR_WORKERS); '
+                             'easyocr-cpu gives each an equal share of the cores')
+    args = parser.parse_args()
+    if args.workers:
+        # read by the engine when it is created
+        os.environ['OCR_WORKERS'] = str(args.workers)
+
+    for video_path in args.videos:
+        metrics = Metrics(os.path.basename(video_path))
+        ocr_range = resolve_range(video_path, args.roi, metrics)
+        print(f'OCR region: {ocr_range}')
+        tracks = extract_tracks(video_path, ocr_range, metrics=metrics,
+                                engine=args.engine, contrast=args.contrast)
+        save_tracks(tracks, os.path.splitext(video_path)[0] + '.srt', ocr_range)
+        metrics.save(metrics_path(video_path))
+        hit_rate = metrics.rate('cache_hits', 'cache_misses')
+        if hit_rate is not None:
+            print(f'OCR cache hit rate: {hit_rate:.1%}')
+
+
+if __name__ == '__main__':
+    main()
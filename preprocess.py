@@ -0,0 +1,124 @@
+import cv2
+import numpy as np
+from roi import BRIGHT_THRESHOLD, EDGE_THRESHOLD
+
+CONTRAST_MODES = (None, 'normalize', 'binarize')
+# caption fill is near white, so a busy background never sets the binarization threshold below this
+MIN_BINARIZE_THRESHOLD = 180
+# a caption line never fills the whole crop; taller runs are scenery
+MAX_TEXT_HEIGHT_RATIO = 0.6
+# share of the caption rows that must be bright strokes
+MIN_STROKE_DENSITY = 0.01
+
+
+class ROIPreprocessor:
+    """Brings caption crops to the recognizer's preferred text height before OCR
+
+    The text height is measured from the row profile of horizontal gradients
+    every `measure_every` frames and smoothed, so the scale stays stable and
+    crops of one video keep the same size. Frames without caption-like text
+    are not measured, and until the first caption is measured every frame is
+    tried and the scale stays 1. All work happens in buffers
+    allocated once per crop size, so the returned image is overwritten by the
+    next call.
+    """
+
+    def __init__(self, target_height=None, grayscale=False, contrast=None,
+                 min_scale=0.25, max_scale=1.5, measure_every=30):
+        if contrast not in CONTRAST_MODES:
+            raise ValueError(f'Unknown contrast mode: {contrast}')
+        self.target_height = target_height
+        # contrast normalization and binarization work on a single channel
+        self.grayscale = grayscale or contrast is not None
+        self.to_bgr = contrast is not None and not grayscale
+        self.contrast = contrast
+        self.min_scale = min_scale
+        self.max_scale = max_scale
+        self.measure_every = measure_every
+        self.text_height = None
+        self.scale = 1.0
+        self.calls = 0
+        self.buffers = {}
+
+    def buffer(self, name, shape):
+        buffer = self.buffers.get(name)
+        if buffer is None or buffer.shape != shape:
+            buffer = self.buffers[name] = np.empty(shape, np.uint8)
+        return buffer
+
+    def measure_text_height(self, gray):
+        """Height in pixels of the tallest band of rows crossed by many strokes
+
+        None if the crop shows no caption: the band is too tall to be a text
+        line or holds too few bright strokes.
+        """
+        rows, columns = gray.shape
+        if rows < 3 or columns < 3:
+            return None
+        # vertical strokes give strong left-right differences over the whole glyph height
+        diff = self.buffer('diff', (rows, columns - 1))
+        cv2.absdiff(gray[:, 1:], gray[:, :-1], dst=diff)
+        profile = diff.mean(axis=1)
+        threshold = profile.max() * 0.25
+        if threshold < 1:
+            return None
+        best = run = 0
+        best_end = 0
+        for row, active in enumerate(profile > threshold):
+            run = run + 1 if active else 0
+            if run > best:
+                best, best_end = run, row + 1
+        if best < 3 or best > rows * MAX_TEXT_HEIGHT_RATIO:
+            return None
+        band = slice(best_end - best, best_end)
+        bright = cv2.dilate(gray[band, 1:], np.ones((3, 3), np.uint8)) >= BRIGHT_THRESHOLD
+        strokes = np.count_nonzero(bright & (diff[band] >= EDGE_THRESHOLD))
+        if strokes < best * (columns - 1) * MIN_STROKE_DENSITY:
+            return None
+        return best
+
+    def update_scale(self, gray):
+        """Fold a measurement into the text height; True if the crop showed text"""
+        height = self.measure_text_height(gray)
+        if height is None:
+            return False
+        self.text_height = height if self.text_height is None else 0.8 * self.text_height + 0.2 * height
+        scale = self.target_height / self.text_height
+        # sixteenth steps keep the output size from jittering between frames
+        scale = round(scale * 16) / 16
+        self.scale = min(self.max_scale, max(self.min_scale, scale))
+        return True
+
+    def __call__(self, crop):
+        image = crop
+        if self.grayscale and crop.ndim == 3:
+            image = self.buffer('gray', crop.shape[:2])
+            cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY, dst=image)
+
+        if self.target_height:
+            # frames are counted only once they show text, so gaps between captions
+            # postpone the next measurement instead of wasting it
+            if self.calls % self.measure_every == 0:
+                gray = image if image.ndim == 2 else cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+                if self.update_scale(gray):
+                    self.calls += 1
+            else:
+                self.calls += 1
+            if self.scale != 1.0:
+                size = (max(1, round(image.shape[1] * self.scale)), max(1, round(image.shape[0] * self.scale)))
+                scaled = self.buffer('scaled', (size[1], size[0]) + image.shape[2:])
+                interpolation = cv2.INTER_AREA if self.scale < 1 else cv2.INTER_LINEAR
+                cv2.resize(image, size, dst=scaled, interpolation=interpolation)
+                image = scaled
+
+        if self.contrast == 'normalize':
+            cv2.normalize(image, image, 0, 255, cv2.NORM_MINMAX)
+        elif self.contrast == 'binarize':
+            threshold, _ = cv2.threshold(image, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+            cv2.threshold(image, max(threshold, MIN_BINARIZE_THRESHOLD), 255, cv2.THRESH_BINARY, dst=image)
+
+        if self.to_bgr:
+            bgr = self.buffer('bgr', image.shape + (3,))
+            cv2.cvtColor(image, cv2.COLOR_GRAY2BGR, dst=bgr)
+            image = bgr
+        return image
@@ -0,0 +1,67 @@
+from collections import deque
+import queue
+import threading
+import time
+
+
+class ProgressChannel:
+    """Hands worker events to the Tk thread
+
+    Workers post from any thread; the UI drains the channel on a fixed tick.
+    Progress updates are coalesced per job so only the latest state is kept,
+    while calls are queued and run in order on the UI thread.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latest = {}
+        self._calls = queue.SimpleQueue()
+
+    def post(self, job):
+        with self._lock:
+            self._latest[job.id] = job
+
+    def call(self, fn, *args):
+        self._calls.put((fn, args))
+
+    def drain(self):
+        """Return (updated jobs, pending calls) posted since the last drain"""
+        with self._lock:
+            jobs = list(self._latest.values())
+            self._latest = {}
+        calls = []
+        while True:
+            try:
+                calls.append(self._calls.get_nowait())
+            except queue.Empty:
+                break
+        return jobs, calls
+
+
+class RateMeter:
+    """Frames per second and ETA over a sliding time window"""
+
+    def __init__(self, window=5.0):
+        self.window = window
+        self.samples = deque()
+
+    def update(self, frame, now=None):
+        now = time.monotonic() if now is None else now
+        if self.samples and frame < self.samples[-1][1]:
+            self.samples.clear()
+        self.samples.append((now, frame))
+        while len(self.samples) > 2 and now - self.samples[1][0] > self.window:
+            self.samples.popleft()
+
+    @property
+    def fps(self):
+        if len(self.samples) < 2:
+            return 0
+        (t0, f0), (t1, f1) = self.samples[0], self.samples[-1]
+        return (f1 - f0) / (t1 - t0) if t1 > t0 else 0
+
+    def eta(self, frame, total_frames):
+        fps = self.fps
+        if not fps or not total_frames:
+            return None
+        return max(0, total_frames - frame) / fps
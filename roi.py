@@ -0,0 +1,131 @@
+import re
+import cv2
+import numpy as np
+
+DEFAULT_RANGE = {'top': 0.76, 'bottom': 0.98, 'left': 0.10, 'right': 0.90}
+# name of the region when only one is given
+DEFAULT_TRACK = 'main'
+# region names become part of file names (<video>.<name>.srt)
+REGION_NAME = re.compile(r'[\w-]+')
+
+# frames are shrunk to this width before scoring; captions stay several pixels tall
+HEATMAP_WIDTH = 320
+# a stroke pixel has a strong left-right difference next to a near-white pixel
+EDGE_THRESHOLD = 48
+BRIGHT_THRESHOLD = 180
+# pixels that are strokes in nearly every sample are logos or borders, not captions
+STATIC_RATIO = 0.9
+
+
+def named_ranges(ocr_range):
+    """{name: range} for a single OCR range or a mapping of named ones"""
+    if not ocr_range:
+        raise ValueError('No OCR region given')
+    if not all(isinstance(value, dict) for value in ocr_range.values()):
+        return {DEFAULT_TRACK: ocr_range}
+    for name in ocr_range:
+        if not REGION_NAME.fullmatch(name):
+            raise ValueError(f'Invalid region name {name!r}: use letters, digits, _ and -')
+    return dict(ocr_range)
+
+
+def sample_frames(cap, samples):
+    """Yield `samples` frames spread over the video, skipping intros and credits"""
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    if total_frames <= 0:
+        return
+    start, stop = int(total_frames * 0.05), int(total_frames * 0.95)
+    for i in range(samples):
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start + (stop - start) * i // samples)
+        ret, frame = cap.read()
+        if ret:
+            yield frame
+
+
+def stroke_map(frame):
+    """Boolean map of likely caption strokes in a downscaled grayscale frame"""
+    height, width = frame.shape[:2]
+    size = (HEATMAP_WIDTH, max(1, round(height * HEATMAP_WIDTH / width)))
+    gray = cv2.cvtColor(cv2.resize(frame, size, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+    edges = np.zeros(gray.shape, np.uint8)
+    cv2.absdiff(gray[:, 1:], gray[:, :-1], dst=edges[:, 1:])
+    bright = cv2.dilate(gray, np.ones((3, 3), np.uint8)) >= BRIGHT_THRESHOLD
+    return (edges >= EDGE_THRESHOLD) & bright
+
+
+def text_heatmap(cap, samples=36):
+    """Fraction of sampled frames in which each pixel looks like a caption stroke"""
+    heatmap = None
+    count = 0
+    for frame in sample_frames(cap, samples):
+        strokes = stroke_map(frame)
+        if heatmap is None:
+            heatmap = np.zeros(strokes.shape, np.float32)
+        heatmap += strokes
+        count += 1
+    if heatmap is None:
+        return None
+    heatmap /= count
+    heatmap[heatmap >= STATIC_RATIO] = 0
+    return heatmap
+
+
+def longest_band(profile, threshold, max_gap):
+    """(first, last) of the band around the profile's peak, bridging gaps up to max_gap"""
+    peak = int(np.argmax(profile))
+    active = profile >= threshold
+    first = last = peak
+    gap = 0
+    for i in range(peak - 1, -1, -1):
+        gap = 0 if active[i] else gap + 1
+        if gap > max_gap:
+            break
+        if active[i]:
+            first = i
+    gap = 0
+    for i in range(peak + 1, len(profile)):
+        gap = 0 if active[i] else gap + 1
+        if gap > max_gap:
+            break
+        if active[i]:
+            last = i
+    return first, last
+
+
+def propose_range(heatmap, margin=0.25, min_strength=0.002):
+    """Tightest OCR range holding the caption band of a heatmap, or None if no captions show
+
+    `margin` pads the band vertically by that fraction of its height.
+    """
+    height, width = heatmap.shape
+    rows = cv2.blur(heatmap.mean(axis=1).reshape(-1, 1), (1, 3)).ravel()
+    if rows.max() < min_strength:
+        return None
+    # two-line captions are separated by less than a line height
+    top, bottom = longest_band(rows, rows.max() * 0.2, max(1, height // 30))
+    columns = heatmap[top:bottom + 1].mean(axis=0)
+    left, right = longest_band(columns, columns.max() * 0.05, max(1, width // 10))
+    # samples rarely catch the longest line; centered captions grow both ways
+    if abs((left + right + 1) / 2 - width / 2) < width * 0.1:
+        left = min(left, width - 1 - right)
+        right = width - 1 - left
+
+    pad_y = (bottom - top + 1) * margin
+    # about two glyphs on each side
+    pad_x = (bottom - top + 1) * 2
+    return {
+        'top': round(max(0.0, (top - pad_y) / height), 3),
+        'bottom': round(min(1.0, (bottom + 1 + pad_y) / height), 3),
+        'left': round(max(0.0, (left - pad_x) / width), 3),
+        'right': round(min(1.0, (right + 1 + pad_x) / width), 3),
+    }
+
+
+def detect_caption_region(cap, samples=36):
+    """Propose an OCR range from frames sampled across an open video, or None"""
+    position = cap.get(cv2.CAP_PROP_POS_FRAMES)
+    try:
+        heatmap = text_heatmap(cap, samples)
+    finally:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, position)
+    return propose_range(heatmap) if heatmap is not None else None
@@ -0,0 +1,76 @@
+import re
+from collections import defaultdict
+
+
+def ngrams(text, n):
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class SubtitleIndex:
+    """Character unigram/bigram index over subtitle texts.
+
+    Items are tracked by identity, so edits, deletions and merges only
+    re-index the lines that actually changed.
+    """
+
+    def __init__(self):
+        self.postings = defaultdict(set)
+        self.items = {}  # key -> (item, indexed text)
+        self.positions = {}  # key -> position in the current list
+
+    def sync(self, subtitles):
+        seen = set()
+        self.positions = {}
+        for position, item in enumerate(subtitles):
+            key = id(item)
+            seen.add(key)
+            self.positions[key] = position
+            entry = self.items.get(key)
+            if entry is None or entry[1] != item.text:
+                if entry is not None:
+                    self._remove(key, entry[1])
+                self._add(key, item)
+        for key in list(self.items):
+            if key not in seen:
+                self._remove(key, self.items[key][1])
+                del self.items[key]
+
+    def search(self, query, regex=False):
+        """Return sorted positions of subtitles matching the query"""
+        if not query:
+            return []
+        if regex:
+            pattern = re.compile(query)
+            return sorted(self.positions[key] for key, (item, text) in self.items.items()
+                          if key in self.positions and pattern.search(text))
+
+        candidates = None
+        for gram in sorted(ngrams(query, min(len(query), 2)),
+                           key=lambda g: len(self.postings.get(g, ()))):
+            keys = self.postings.get(gram)
+            if not keys:
+                return []
+            candidates = set(keys) if candidates is None else candidates & keys
+            if not candidates:
+                return []
+        return sorted(self.positions[key] for key in candidates
+                      if key in self.positions and query in self.items[key][1])
+
+    def _add(self, key, item):
+        self.items[key] = (item, item.text)
+        for gram in ngrams(item.text, 1) | ngrams(item.text, 2):
+            self.postings[gram].add(key)
+
+    def _remove(self, key, text):
+        for gram in ngrams(text, 1) | ngrams(text, 2):
+            keys = self.postings.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.postings[gram]
+
+
+def replace_text(text, query, replacement, regex=False):
+    if regex:
+        return re.sub(query, replacement, text)
+    return text.replace(query, replacement)
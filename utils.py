@@ -1,8 +1,15 @@
+from collections import namedtuple
 from datetime import timedelta
+import json
+import os
 import re
 import pysrt
 import tkinter as tk
 
+# Where a subtitle was read from: the best-confidence frame and the sampled frame range
+Evidence = namedtuple('Evidence', ['best_ms', 'confidence', 'first_frame', 'last_frame'])
+EVIDENCE_VERSION = 1
+
 
 def move_down(listbox):
     current_selection = listbox.curselection()
@@ -115,16 +122,15 @@ class SubtitleMaker:
         self.last_text = ''
         self.last_confidence = 0
         self.start_time = None
+        self.best_time = None
+        self.best_confidence = 0
+        self.first_frame = None
+        self.last_frame = None
 
-    def next_frame(self, frame_time, text, confidence):
+    def next_frame(self, frame_time, text, confidence, frame_index=None):
         text = postprocessing(text)
         if not text:
-            if self.last_text and self._elapsed(frame_time) >= self.MIN_SENTENCE_TIME:
-                self.subtitles.append(pysrt.SubRipItem(
-                    index=len(self.subtitles) + 1,
-                    start=self._to_srttime(self.start_time),
-                    end=self._to_srttime(frame_time),
-                    text=self.last_text))
+            self._emit(frame_time)
             self.start_time = None
             self.last_text = ''
             self.last_confidence = 0
@@ -136,27 +142,39 @@ class SubtitleMaker:
             elif confidence > self.last_confidence:
                 self.last_text = text
                 self.last_confidence = confidence
+            if confidence > self.best_confidence:
+                self.best_time = frame_time
+                self.best_confidence = confidence
+            self.last_frame = frame_index
         else:
-            if self.last_text and self._elapsed(frame_time) >= self.MIN_SENTENCE_TIME:
-                self.subtitles.append(pysrt.SubRipItem(
-                    index=len(self.subtitles) + 1,
-                    start=self._to_srttime(self.start_time),
-                    end=self._to_srttime(frame_time),
-                    text=self.last_text))
+            self._emit(frame_time)
             self.start_time = frame_time
             self.last_text = text
             self.last_confidence = confidence
+            self.best_time = frame_time
+            self.best_confidence = confidence
+            self.first_frame = frame_index
+            self.last_frame = frame_index
 
     def end(self, end_time):
+        self._emit(end_time)
+
+    def get_subtitles(self):
+        return self.subtitles
+
+    def _emit(self, end_time):
         if self.last_text and self._elapsed(end_time) >= self.MIN_SENTENCE_TIME:
-            self.subtitles.append(pysrt.SubRipItem(
+            item = pysrt.SubRipItem(
                 index=len(self.subtitles) + 1,
                 start=self._to_srttime(self.start_time),
                 end=self._to_srttime(end_time),
-                text=self.last_text))
-
-    def get_subtitles(self):
-        return self.subtitles
+                text=self.last_text)
+            item.evidence = Evidence(
+                best_ms=int(self.best_time.total_seconds() * 1000),
+                confidence=float(self.best_confidence),
+                first_frame=self.first_frame,
+                last_frame=self.last_frame)
+            self.subtitles.append(item)
 
     def _to_srttime(self, td: timedelta):
         total_ms = int(td.total_seconds() * 1000)
@@ -184,3 +202,66 @@ class SubtitleMaker:
             return dist <= 1
         else:
             return dist <= 2
+
+
+def track_path(srt_path, name):
+    """Path of a named region's SRT next to the main one"""
+    return f'{os.path.splitext(srt_path)[0]}.{name}.srt'
+
+
+def evidence_path(srt_path):
+    return os.path.splitext(srt_path)[0] + '.evidence.json'
+
+
+def save_evidence(subtitles, srt_path, region=None):
+    """Write the evidence of subtitles next to srt_path
+
+    region is {name: OCR range} of the track, kept so the crops can be found
+    again later (e.g. by export.py).
+    """
+    rows = []
+    for subtitle in subtitles:
+        evidence = getattr(subtitle, 'evidence', None)
+        if evidence is not None:
+            rows.append([get_milliseconds(subtitle.start), evidence.best_ms,
+                         round(evidence.confidence, 4), evidence.first_frame, evidence.last_frame])
+    path = evidence_path(srt_path)
+    if not rows and region is None:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    data = {'version': EVIDENCE_VERSION,
+            'fields': ['start_ms', *Evidence._fields],
+            'items': rows}
+    if region is not None:
+        data['ocr_range'] = region
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, separators=(',', ':'))
+
+
+def load_region(srt_path):
+    """{name: OCR range} the track at srt_path was extracted with, or None if not recorded"""
+    path = evidence_path(srt_path)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f).get('ocr_range')
+
+
+def load_evidence(subtitles, srt_path):
+    """Attach sidecar evidence to subtitles, matched by start time"""
+    path = evidence_path(srt_path)
+    if not os.path.exists(path):
+        return 0
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    if data.get('version') != EVIDENCE_VERSION:
+        return 0
+    by_start = {row[0]: Evidence(*row[1:]) for row in data['items']}
+    count = 0
+    for subtitle in subtitles:
+        evidence = by_start.get(get_milliseconds(subtitle.start))
+        if evidence is not None:
+            subtitle.evidence = evidence
+            count += 1
+    return count